@@ -0,0 +1,83 @@
+"""
+Requirements file parsing with cold and warm parse caches, time and peak memory.
+
+    python benchmarks/requirements_parsing.py --lines 10000 --distinct 2000
+"""
+
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+
+from pirg.utils import (
+    canonicalize_name,
+    get_specifier_set,
+    load_requirements_file,
+    make_package,
+    parse_package_name,
+)
+
+SPECIFIERS = ["", "==1.0.0", ">=2.1", ">=1.0,<2.0", "~=3.4", "!=1.5.2"]
+
+
+def random_requirements(lines: int, distinct: int, seed: int = 0):
+    rnd = random.Random(seed)
+    alphabet = string.ascii_lowercase + "-_"
+    names = [
+        f"{rnd.choice(string.ascii_letters)}{''.join(rnd.choices(alphabet, k=10))}"
+        for _ in range(distinct)
+    ]
+    return [
+        f"{rnd.choice(names)}{'[extra]' if rnd.random() < 0.1 else ''}{rnd.choice(SPECIFIERS)}"
+        for _ in range(lines)
+    ]
+
+
+def clear_caches() -> None:
+    for func in (parse_package_name, canonicalize_name, get_specifier_set, make_package):
+        func.cache_clear()
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=10_000)
+    parser.add_argument("--distinct", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        requirements_path = os.path.join(tmp, "requirements.txt")
+        with open(requirements_path, "w") as file:
+            file.write("\n".join(random_requirements(args.lines, args.distinct)) + "\n")
+
+        clear_caches()
+        cold, cold_time, cold_peak = measure(load_requirements_file, requirements_path)
+        warm, warm_time, warm_peak = measure(load_requirements_file, requirements_path)
+        assert cold == warm
+
+        print(f"{args.lines} lines, {len(cold)} distinct requirements")
+        print(f"load  cold: {cold_time:.3f}s {cold_peak / 1024:.0f} KiB peak")
+        print(f"load  warm: {warm_time:.3f}s {warm_peak / 1024:.0f} KiB peak")
+        print(f"make_package: {make_package.cache_info()}")
+
+        specifiers = [str(pkg.specifier_set or "") for pkg in cold]
+        clear_caches()
+        _, cold_time, _ = measure(lambda: [get_specifier_set(s) for s in specifiers])
+        _, warm_time, _ = measure(lambda: [get_specifier_set(s) for s in specifiers])
+        print(f"specifier sets  cold: {cold_time:.3f}s  warm: {warm_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Incremental vs. full rebuild of the search index and name filter after a database update.
+
+    python benchmarks/search_index.py --names 500000 --added 3000 --removed 100
+"""
+
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+
+from pirg.database import create_name_filter, diff_package_names
+from pirg.models import BloomFilter
+from pirg.search_index import SearchIndex
+
+
+def random_names(count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    alphabet = string.ascii_lowercase + "-_"
+    names = {
+        f"{rnd.choice(string.ascii_letters)}{''.join(rnd.choices(alphabet, k=12))}"
+        for _ in range(count)
+    }
+    return sorted(names)
+
+
+def timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--names", type=int, default=500_000)
+    parser.add_argument("--added", type=int, default=3_000)
+    parser.add_argument("--removed", type=int, default=100)
+    args = parser.parse_args()
+
+    old_names = random_names(args.names)
+    new_names = old_names[args.removed :] + random_names(args.added, seed=1)
+    added, removed = diff_package_names(old_names, new_names)
+    print(f"{len(old_names)} names, +{len(added)} -{len(removed)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SearchIndex(os.path.join(tmp, "index"))
+        index.rebuild(old_names, "v1")
+
+        full = timed(index.rebuild, new_names, "v2")
+        index.rebuild(old_names, "v1")
+        incremental = timed(index.apply, added, removed, "v2")
+        print(f"search index  full rebuild: {full:.3f}s  incremental: {incremental:.3f}s")
+        assert index.load("v2") == {name.lower(): name for name in new_names}
+
+        filename = os.path.join(tmp, "names.bloom")
+        create_name_filter(filename, old_names)
+        with open(filename, "rb") as file:
+            previous = BloomFilter.from_bytes(file.read())
+
+        full = timed(create_name_filter, filename, new_names)
+        incremental = timed(create_name_filter, filename, new_names, previous, added)
+        print(f"name filter   full rebuild: {full:.3f}s  incremental: {incremental:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,2 @@
-from .pirg import main
+from .models import InstallPlan, Package
+from .resolver import Resolver
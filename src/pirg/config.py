@@ -2,6 +2,8 @@ from rich.logging import RichHandler
 
 log_config = {
     "version": 1,
+    # pirg is importable as a library, loggers of the host application stay enabled
+    "disable_existing_loggers": False,
     "formatters": {
         "verbose": {
             "format": "%(message)s",
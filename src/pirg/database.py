@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from .exceptions import UnknownPackage
+from .models import BloomFilter
+from .search_index import SearchIndex
+from .utils import canonicalize_name, fuzzy_search, parse_package_name
+
+FORMAT_VERSION = 2
+HEADER_PREFIX = "# pirg-db "
+CURRENT_FILENAME = "CURRENT"
+NAMES_FILENAME = "names.txt"
+FILTER_FILENAME = "names.bloom"
+KEEP_SNAPSHOTS = 3
+FILTER_HEADROOM = 1.1
+
+
+def get_cache_dir() -> str:
+    cache_dir = os.environ.get("PIRG_CACHE_DIR")
+    if cache_dir:
+        return cache_dir
+
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "pirg", "Cache")
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~"), "Library", "Caches", "pirg")
+
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pirg")
+
+
+def get_db_dir() -> str:
+    return os.path.join(get_cache_dir(), "db")
+
+
+def current_snapshot(db_dir: str) -> Optional[str]:
+    """
+    Returns the directory of the snapshot `CURRENT` points to, or None if there is none.
+    Snapshots are never modified after they are published, so readers need no locking.
+    """
+    try:
+        with open(os.path.join(db_dir, CURRENT_FILENAME), "r") as file:
+            version = file.read().strip()
+    except FileNotFoundError:
+        return None
+
+    snapshot = os.path.join(db_dir, version)
+    return snapshot if version and os.path.isdir(snapshot) else None
+
+
+def read_header(snapshot: str) -> Dict[str, str]:
+    with open(os.path.join(snapshot, NAMES_FILENAME), "r") as file:
+        line = file.readline()
+
+    if not line.startswith(HEADER_PREFIX):
+        return {}
+    return json.loads(line[len(HEADER_PREFIX) :])
+
+
+def load_package_names(snapshot: str) -> List[str]:
+    with open(os.path.join(snapshot, NAMES_FILENAME), "r") as file:
+        return [line.strip() for line in file if line.strip() and not line.startswith("#")]
+
+
+def load_name_filter(snapshot: str) -> Optional[BloomFilter]:
+    filename = os.path.join(snapshot, FILTER_FILENAME)
+    if not os.path.exists(filename):
+        return None
+
+    with open(filename, "rb") as file:
+        data = file.read()
+
+    try:
+        return BloomFilter.from_bytes(data)
+    except ValueError as e:
+        # written by an older pirg, `initdb --update` builds a new one
+        logging.debug(f"Ignoring name filter {filename}: {e}")
+        return None
+
+
+def create_name_filter(
+    filename: str,
+    package_names: List[str],
+    previous: Optional[BloomFilter] = None,
+    added: Optional[List[str]] = None,
+) -> None:
+    # removed names stay in a reused filter, that only costs a PyPI request for them
+    if (
+        previous is not None
+        and added is not None
+        and previous.count + len(added) <= previous.capacity
+    ):
+        name_filter, package_names = previous, added
+    else:
+        name_filter = BloomFilter.for_capacity(int(len(package_names) * FILTER_HEADROOM))
+
+    for name in package_names:
+        name_filter.add(canonicalize_name(name))
+
+    with open(filename, "wb") as file:
+        file.write(name_filter.to_bytes())
+
+
+def get_index_dir() -> str:
+    return os.path.join(get_cache_dir(), "index")
+
+
+def diff_package_names(old_names: List[str], new_names: List[str]) -> Tuple[List[str], List[str]]:
+    old, new = set(old_names), set(new_names)
+    added = [name for name in new_names if name not in old]
+    removed = [name for name in old_names if name not in new]
+    return added, removed
+
+
+def update_search_index(
+    search_index: SearchIndex,
+    previous: Optional[str],
+    snapshot: str,
+    package_names: List[str],
+    diff: Optional[Tuple[List[str], List[str]]] = None,
+) -> None:
+    version = os.path.basename(snapshot)
+    if previous and diff is not None and search_index.version == os.path.basename(previous):
+        added, removed = diff
+        logging.debug(f"Search index: +{len(added)} -{len(removed)}")
+        search_index.apply(added, removed, version)
+    else:
+        logging.debug("Search index: full rebuild")
+        search_index.rebuild(package_names, version)
+
+
+def load_search_index(snapshot: str, search_index: Optional[SearchIndex] = None) -> Dict[str, str]:
+    search_index = search_index or SearchIndex(get_index_dir())
+    indexed_package_names = search_index.load(os.path.basename(snapshot))
+    if indexed_package_names is None:
+        # index lags behind the database, e.g. `initdb` is still running
+        indexed_package_names = {name.lower(): name for name in load_package_names(snapshot)}
+    return indexed_package_names
+
+
+def create_db(
+    db_dir: str,
+    data: str,
+    etag: Optional[str] = None,
+    search_index: Optional[SearchIndex] = None,
+    index_url: Optional[str] = None,
+) -> str:
+    """
+    Builds a new snapshot from the PyPI simple index page and atomically makes it current.
+    Structures derived from the previous snapshot are updated with the difference only.
+    Returns the snapshot directory.
+    """
+    soup = BeautifulSoup(data, "html.parser")
+    links = soup.find_all("a")
+    package_names = [link.text.strip() for link in links if link.text.strip()]
+
+    os.makedirs(db_dir, exist_ok=True)
+    built = datetime.now(timezone.utc)
+    version = built.strftime("%Y%m%dT%H%M%S%fZ")
+    # the ETag is only meaningful to the index it came from
+    header = {
+        "format": FORMAT_VERSION,
+        "built": built.isoformat(),
+        "etag": etag,
+        "index": index_url,
+    }
+
+    previous = current_snapshot(db_dir)
+    diff = diff_package_names(load_package_names(previous), package_names) if previous else None
+    # filters of an older format are rebuilt, not extended
+    same_format = previous and read_header(previous).get("format") == FORMAT_VERSION
+    previous_filter = load_name_filter(previous) if same_format else None
+
+    # build everything in a private directory and publish it with renames only
+    build_dir = tempfile.mkdtemp(prefix=".build-", dir=db_dir)
+    try:
+        with open(os.path.join(build_dir, NAMES_FILENAME), "w") as file:
+            file.write(HEADER_PREFIX + json.dumps(header) + "\n")
+            for package in package_names:
+                file.write(package + "\n")
+
+        if package_names:
+            create_name_filter(
+                os.path.join(build_dir, FILTER_FILENAME),
+                package_names,
+                previous=previous_filter,
+                added=diff[0] if diff else None,
+            )
+
+        snapshot = os.path.join(db_dir, version)
+        os.rename(build_dir, snapshot)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    fd, current_tmp = tempfile.mkstemp(prefix=".current-", dir=db_dir)
+    with os.fdopen(fd, "w") as file:
+        file.write(version)
+    os.replace(current_tmp, os.path.join(db_dir, CURRENT_FILENAME))
+
+    if search_index is not None:
+        update_search_index(search_index, previous, snapshot, package_names, diff)
+
+    prune_snapshots(db_dir)
+    return snapshot
+
+
+def prune_snapshots(db_dir: str, keep: int = KEEP_SNAPSHOTS) -> None:
+    # readers that already resolved an older snapshot keep working until it falls out of `keep`
+    current = current_snapshot(db_dir)
+    snapshots = sorted(
+        entry.path
+        for entry in os.scandir(db_dir)
+        if entry.is_dir() and not entry.name.startswith(".")
+    )
+    for snapshot in snapshots[:-keep]:
+        if snapshot != current:
+            logging.debug(f"Removing old database snapshot: {snapshot}")
+            shutil.rmtree(snapshot, ignore_errors=True)
+
+
+def check_package_names(
+    package_names: Iterable[str],
+    snapshot: Optional[str],
+    load_filter: Callable[[str], Optional[BloomFilter]] = load_name_filter,
+    load_names: Callable[[str], Dict[str, str]] = load_search_index,
+) -> None:
+    """
+    Rejects names that are not in the local package index without touching PyPI.
+    Does nothing when `initdb` was never run. The loaders let callers reuse what they
+    already have in memory for `snapshot`.
+    """
+    name_filter = load_filter(snapshot) if snapshot else None
+    if name_filter is None:
+        return
+
+    unknown = []
+    for package_name in package_names:
+        name, _, _ = parse_package_name(package_name)
+        if canonicalize_name(name) not in name_filter:
+            unknown.append(name)
+
+    if not unknown:
+        return
+
+    indexed_package_names = load_names(snapshot)
+
+    messages = []
+    for name in unknown:
+        suggestions = fuzzy_search(name.lower(), indexed_package_names)
+        message = f"{name} (did you mean: {', '.join(suggestions)}?)" if suggestions else name
+        messages.append(message)
+
+    # fmt: off
+    raise UnknownPackage(f"Unknown package(s): {'; '.join(messages)}. If recently published, run `initdb --update`")
+    # fmt: on
@@ -24,3 +24,38 @@ class EmptyDatabase(Exception):
         self.message = message
         self.exit_code = 4004
         super().__init__(self.message)
+
+
+class UnknownPackage(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        self.exit_code = 4005
+        super().__init__(self.message)
+
+
+class NoCompatibleVersion(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        self.exit_code = 4006
+        super().__init__(self.message)
+
+
+class InstallerNotAvailable(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        self.exit_code = 4007
+        super().__init__(self.message)
+
+
+class WrongIndexPolicy(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        self.exit_code = 4008
+        super().__init__(self.message)
+
+
+class WrongHedgeDelay(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        self.exit_code = 4009
+        super().__init__(self.message)
@@ -0,0 +1,318 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+import requests
+
+from .exceptions import WrongHedgeDelay, WrongIndexPolicy
+
+INDEX_URLS_ENV = "PIRG_INDEX_URLS"
+INDEX_POLICY_ENV = "PIRG_INDEX_POLICY"
+HEDGE_DELAY_ENV = "PIRG_HEDGE_DELAY"
+INDEX_STATS_FILENAME = "index_stats.json"
+DEFAULT_INDEX_URL = "https://pypi.org/simple/"
+FAILOVER = "failover"
+HEDGE = "hedge"
+POLICIES = (FAILOVER, HEDGE)
+HEDGE_DELAY = 0.5
+INDEX_TIMEOUT = 10
+# weight of the newest sample in the moving average of latency
+LATENCY_SMOOTHING = 0.2
+# errors after which the next index is asked, a body cut short included
+INDEX_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ContentDecodingError,
+)
+
+T = TypeVar("T")
+
+
+def json_url(index_url: str, pkg_name: str) -> str:
+    """
+    JSON API location of `pkg_name` on a Warehouse compatible index,
+    `https://host/simple/` serves it on `https://host/pypi/<name>/json`.
+    """
+    base = index_url.rstrip("/")
+    if base.endswith("/simple"):
+        base = base[: -len("/simple")]
+    return f"{base}/pypi/{pkg_name}/json"
+
+
+class IndexStats:
+    """
+    Per-index request counters and latencies, kept in a JSON file so the index order can be tuned.
+
+    Samples are collected in memory, from any thread, and merged into the file on `save`.
+    """
+
+    def __init__(self, filename: Optional[str] = None):
+        self.filename = filename
+        self._samples: List[List] = []
+        self._lock = threading.Lock()
+
+    def record(self, index_url: str, latency: Optional[float]) -> None:
+        # failed requests are recorded with no latency
+        with self._lock:
+            self._samples.append([index_url, latency])
+
+    def load(self) -> Dict[str, Dict]:
+        if not self.filename:
+            return {}
+        try:
+            with open(self.filename, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        with self._lock:
+            samples, self._samples = self._samples, []
+        if not self.filename or not samples:
+            return
+
+        stats = self.load()
+        for index_url, latency in samples:
+            entry = stats.setdefault(
+                index_url,
+                {"requests": 0, "failures": 0, "total_seconds": 0.0, "recent_seconds": None},
+            )
+            entry["requests"] += 1
+            if latency is None:
+                entry["failures"] += 1
+                continue
+
+            entry["total_seconds"] += latency
+            recent = entry["recent_seconds"]
+            entry["recent_seconds"] = (
+                latency if recent is None else recent + LATENCY_SMOOTHING * (latency - recent)
+            )
+
+        stats_dir = os.path.dirname(self.filename) or "."
+        os.makedirs(stats_dir, exist_ok=True)
+        fd, stats_tmp = tempfile.mkstemp(prefix=".index-stats-", dir=stats_dir)
+        with os.fdopen(fd, "w") as file:
+            json.dump(stats, file)
+        os.replace(stats_tmp, self.filename)
+
+
+class IndexPool:
+    """
+    Ordered list of package indexes queried with one of two policies.
+
+    `failover` asks the indexes one after another and moves on after a timeout, a connection
+    error, a body cut short or a 5xx. `hedge` asks the first index and, if it hasn't answered
+    within `hedge_delay` seconds or failed, the next one as well. The first success wins, a 4xx
+    only once every index before it has failed. Requests that lose are not cancelled, they
+    finish in the background and are dropped. Bodies are read before a response counts as an
+    answer, so returned responses are complete. 4xx responses are answers, a project missing on
+    the primary index is not looked up on the mirrors.
+
+    Use it as a context manager to save the collected latency statistics on exit.
+    """
+
+    def __init__(
+        self,
+        urls: Optional[Iterable[str]] = None,
+        policy: str = FAILOVER,
+        hedge_delay: float = HEDGE_DELAY,
+        timeout: float = INDEX_TIMEOUT,
+        stats: Optional[IndexStats] = None,
+    ):
+        if policy not in POLICIES:
+            raise WrongIndexPolicy(
+                f"Unknown index policy {policy}, choose from: {', '.join(POLICIES)}"
+            )
+        if not hedge_delay >= 0:
+            raise WrongHedgeDelay(
+                f"Hedge delay must be a non-negative number of seconds, got {hedge_delay}"
+            )
+
+        self.urls = list(urls or [DEFAULT_INDEX_URL])
+        self.policy = policy
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.stats = stats or IndexStats()
+
+    def __enter__(self) -> "IndexPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stats.save()
+
+    def _request(
+        self,
+        http,
+        index_url: str,
+        url: str,
+        headers: Dict[str, str],
+    ) -> requests.Response:
+        start = time.perf_counter()
+        try:
+            # body is read here, a connection dropped mid-body fails over like any other error
+            response = http.get(url, headers=headers, timeout=self.timeout)
+        except INDEX_ERRORS:
+            self.stats.record(index_url, None)
+            raise
+
+        failed = response.status_code >= 500
+        self.stats.record(index_url, None if failed else time.perf_counter() - start)
+        logging.debug(f"{url}: {response.status_code} in {time.perf_counter() - start:.3f}s")
+        return response
+
+    def get(
+        self,
+        make_url: Callable[[str], str],
+        headers: Optional[Dict[str, str]] = None,
+        session: Optional[requests.Session] = None,
+    ) -> requests.Response:
+        """
+        GETs `make_url(index_url)` from the indexes according to the policy. Returns the last
+        5xx response, or raises the last error, when no index gave a valid answer.
+        """
+        http = session or requests
+        headers = headers or {}
+        if self.policy == HEDGE and len(self.urls) > 1:
+            return self._hedged_get(make_url, headers, http)
+        return self._failover_get(make_url, headers, http)
+
+    def _failover_get(self, make_url, headers, http) -> requests.Response:
+        response = None
+        error = None
+        for index_url in self.urls:
+            try:
+                answer = self._request(http, index_url, make_url(index_url), headers)
+            except INDEX_ERRORS as e:
+                logging.debug(f"{index_url}: {e}")
+                error = e
+                continue
+
+            # only the last 5xx is returned when no index answers
+            if response is not None:
+                response.close()
+            response = answer
+            if response.status_code < 500:
+                return response
+            logging.debug(f"{index_url}: {response.status_code}, trying next index")
+
+        if response is not None:
+            return response
+        raise error
+
+    def _hedged_get(self, make_url, headers, http) -> requests.Response:
+        executor = ThreadPoolExecutor(max_workers=len(self.urls))
+        # in index order
+        futures: List[Future] = []
+
+        def launch() -> None:
+            index_url = self.urls[len(futures)]
+            future = executor.submit(self._request, http, index_url, make_url(index_url), headers)
+            futures.append(future)
+
+        try:
+            launch()
+            while True:
+                answer = _first_answer(futures)
+                pending = [future for future in futures if not future.done()]
+                more = len(futures) < len(self.urls)
+                if answer is not None or not (pending or more):
+                    break
+                if not pending:
+                    launch()
+                    continue
+
+                done, _ = wait(
+                    pending, timeout=self.hedge_delay if more else None, return_when=FIRST_COMPLETED
+                )
+                if not done:
+                    logging.debug(f"No answer within {self.hedge_delay}s, hedging")
+                    launch()
+                elif more and any(_failed(future) for future in done):
+                    # a failed index doesn't wait for the delay
+                    launch()
+        finally:
+            # requests still running finish in the background, their responses are dropped
+            executor.shutdown(wait=False)
+
+        responses = [f.result() for f in futures if f.done() and f.exception() is None]
+        if answer is None and not responses:
+            raise futures[-1].exception()
+
+        # the answer, or the last 5xx when no index gave one
+        response = answer.result() if answer is not None else responses[-1]
+        for other in responses:
+            if other is not response:
+                other.close()
+        return response
+
+    def failover(self, func: Callable[[str], T]) -> T:
+        """
+        Calls `func(index_url)` for the indexes in order until one doesn't fail with a request
+        error. Used for downloads, where a second concurrent copy would only waste bandwidth.
+        """
+        for position, index_url in enumerate(self.urls):
+            start = time.perf_counter()
+            try:
+                result = func(index_url)
+                self.stats.record(index_url, time.perf_counter() - start)
+                return result
+            except requests.RequestException as e:
+                response = getattr(e, "response", None)
+                if response is not None and response.status_code < 500:
+                    raise
+                self.stats.record(index_url, None)
+                if position == len(self.urls) - 1:
+                    raise
+                logging.warning(f"{index_url}: {e}, trying next index")
+
+
+def _failed(future: Future) -> bool:
+    return future.exception() is not None or future.result().status_code >= 500
+
+
+def _first_answer(futures: List[Future]) -> Optional[Future]:
+    """
+    Response that settles a hedged request: any success, or a 4xx once no index before it
+    can still answer, a mirror missing a private project doesn't beat a slow primary.
+    """
+    waiting = False
+    for future in futures:
+        if not future.done():
+            waiting = True
+            continue
+        if _failed(future):
+            continue
+        status_code = future.result().status_code
+        if status_code < 400 or not waiting:
+            return future
+    return None
+
+
+def get_index_pool(
+    urls: Optional[List[str]] = None,
+    policy: Optional[str] = None,
+    stats_file: Optional[str] = None,
+) -> IndexPool:
+    """
+    Index pool from arguments, falling back to `PIRG_INDEX_URLS` (comma or space separated),
+    `PIRG_INDEX_POLICY` and `PIRG_HEDGE_DELAY`, then to PyPI alone.
+    """
+    if not urls:
+        urls = [url for url in re.split(r"[,\s]+", os.environ.get(INDEX_URLS_ENV, "")) if url]
+
+    policy = (policy or os.environ.get(INDEX_POLICY_ENV) or FAILOVER).lower()
+    try:
+        hedge_delay = float(os.environ.get(HEDGE_DELAY_ENV) or HEDGE_DELAY)
+    except ValueError:
+        raise WrongHedgeDelay(
+            f"{HEDGE_DELAY_ENV} must be a number of seconds, got {os.environ[HEDGE_DELAY_ENV]}"
+        )
+
+    return IndexPool(urls, policy=policy, hedge_delay=hedge_delay, stats=IndexStats(stats_file))
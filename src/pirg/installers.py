@@ -0,0 +1,107 @@
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Type
+
+from .exceptions import InstallerNotAvailable
+
+INSTALLER_ENV = "PIRG_INSTALLER"
+DEFAULT_INSTALLER = "pip"
+
+
+class Installer(ABC):
+    """
+    Runs `install`/`uninstall` for a list of requirement strings.
+    """
+
+    name = ""
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    @abstractmethod
+    def command(self, pip_command: str, pkgs: List[str], pip_args: List[str]) -> List[str]:
+        pass
+
+    def run(self, pip_command: str, pkgs: List[str], pip_args: List[str]) -> float:
+        cmd = self.command(pip_command, pkgs, pip_args)
+        logging.debug(f"{self.name} command: {cmd}")
+
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True)
+        return time.perf_counter() - start
+
+
+class PipInstaller(Installer):
+    # `python -m pip` so packages land in the interpreter pirg runs on, not whatever `pip` is on PATH
+    name = "pip"
+
+    def command(self, pip_command: str, pkgs: List[str], pip_args: List[str]) -> List[str]:
+        return [sys.executable, "-m", "pip", pip_command] + pkgs + pip_args
+
+
+class UvInstaller(Installer):
+    name = "uv"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return shutil.which("uv") is not None
+
+    def command(self, pip_command: str, pkgs: List[str], pip_args: List[str]) -> List[str]:
+        if pip_command == "uninstall":
+            # uv never asks for confirmation
+            pip_args = [arg for arg in pip_args if arg not in ("-y", "--yes")]
+        return ["uv", "pip", pip_command, "--python", sys.executable] + pkgs + pip_args
+
+
+class DryRunInstaller(Installer):
+    """
+    Test double, records what would be run instead of running it.
+    """
+
+    name = "dry-run"
+
+    def __init__(self):
+        self.calls: List[Tuple[str, List[str], List[str]]] = []
+
+    def command(self, pip_command: str, pkgs: List[str], pip_args: List[str]) -> List[str]:
+        return PipInstaller().command(pip_command, pkgs, pip_args)
+
+    def run(self, pip_command: str, pkgs: List[str], pip_args: List[str]) -> float:
+        self.calls.append((pip_command, list(pkgs), list(pip_args)))
+        logging.debug(f"{self.name} command: {self.command(pip_command, pkgs, pip_args)}")
+        return 0.0
+
+
+INSTALLERS: Dict[str, Type[Installer]] = {
+    PipInstaller.name: PipInstaller,
+    UvInstaller.name: UvInstaller,
+    DryRunInstaller.name: DryRunInstaller,
+}
+
+
+def get_installer(name: Optional[str] = None) -> Installer:
+    """
+    Picks installer by `name`, `PIRG_INSTALLER` env var or falls back to pip.
+    `auto` prefers uv when it is on PATH.
+    """
+    name = (name or os.environ.get(INSTALLER_ENV) or DEFAULT_INSTALLER).lower()
+
+    if name == "auto":
+        name = UvInstaller.name if UvInstaller.is_available() else PipInstaller.name
+
+    if name not in INSTALLERS:
+        # fmt: off
+        raise InstallerNotAvailable(f"Unknown installer {name}, choose from: auto, {', '.join(INSTALLERS)}")
+        # fmt: on
+
+    installer_cls = INSTALLERS[name]
+    if not installer_cls.is_available():
+        raise InstallerNotAvailable(f"Installer {name} is not available")
+
+    return installer_cls()
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+from importlib import metadata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from packaging.markers import UndefinedComparison, UndefinedEnvironmentName
+from packaging.requirements import InvalidRequirement, Requirement
+
+from .models import Package
+from .utils import canonicalize_name, get_specifier_set
+
+INVENTORY_FORMAT = 1
+# never reported as orphans or pruned, removing them breaks the environment or pirg itself
+PROTECTED = {"pip", "setuptools", "wheel", "pirg"}
+
+
+def _marker_matches(requirement: Requirement, extra: str) -> bool:
+    if requirement.marker is None:
+        return True
+    try:
+        return requirement.marker.evaluate({"extra": extra})
+    except (UndefinedComparison, UndefinedEnvironmentName):
+        return False
+
+
+def get_inventory_file(cache_dir: str) -> str:
+    # one file per interpreter, so virtualenvs sharing the cache don't evict each other
+    digest = hashlib.sha1(sys.executable.encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, "inventory", f"{digest}.json")
+
+
+class Inventory:
+    """
+    Installed distributions of the running interpreter and their requirement edges.
+
+    `requires` maps canonical name -> extra -> `[dependency, [extras]]` edges,
+    the "" extra holds the dependencies needed without any extra.
+    """
+
+    def __init__(
+        self,
+        versions: Dict[str, str],
+        names: Dict[str, str],
+        requires: Dict[str, Dict[str, List[Tuple[str, List[str]]]]],
+    ):
+        self.versions = versions
+        self.names = names
+        self.requires = requires
+
+    @classmethod
+    def scan(cls, paths: Optional[List[str]] = None) -> "Inventory":
+        versions, names, requires = {}, {}, {}
+
+        for dist in metadata.distributions(path=paths or sys.path):
+            name = dist.metadata["Name"]
+            if not name:
+                continue
+
+            key = canonicalize_name(name)
+            if key in versions:
+                # first one on sys.path shadows the rest, same as the import system
+                continue
+
+            versions[key] = dist.version
+            names[key] = name
+
+            extras = [""] + [
+                canonicalize_name(e) for e in dist.metadata.get_all("Provides-Extra") or []
+            ]
+            edges: Dict[str, List[Tuple[str, List[str]]]] = {extra: [] for extra in extras}
+            for line in dist.requires or []:
+                try:
+                    requirement = Requirement(line)
+                except InvalidRequirement:
+                    logging.debug(f"{name}: skipping invalid requirement {line}")
+                    continue
+
+                for extra in extras:
+                    # extra deps are only those not already needed without the extra
+                    if _marker_matches(requirement, extra) and (
+                        extra == "" or not _marker_matches(requirement, "")
+                    ):
+                        dep_extras = sorted(canonicalize_name(e) for e in requirement.extras)
+                        edges[extra].append([canonicalize_name(requirement.name), dep_extras])
+            requires[key] = edges
+
+        return cls(versions=versions, names=names, requires=requires)
+
+    @classmethod
+    def load(cls, cache_file: str, paths: Optional[List[str]] = None) -> "Inventory":
+        """
+        Returns cached inventory if none of the `paths` directories changed since it was built.
+        Installing or removing a distribution adds or removes its `.dist-info` directory,
+        which updates the mtime of the directory it lives in.
+        """
+        paths = paths or sys.path
+        key = {
+            "format": INVENTORY_FORMAT,
+            "executable": sys.executable,
+            "mtimes": [[p, os.stat(p).st_mtime_ns] for p in paths if os.path.isdir(p)],
+        }
+
+        try:
+            with open(cache_file, "r") as file:
+                cached = json.load(file)
+            if cached["key"] == key:
+                logging.debug("Inventory: cache hit")
+                return cls(**cached["inventory"])
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            pass
+
+        logging.debug("Inventory: scanning environment")
+        inventory = cls.scan(paths)
+
+        cache_dir = os.path.dirname(cache_file) or "."
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, cache_tmp = tempfile.mkstemp(prefix=".inventory-", dir=cache_dir)
+        with os.fdopen(fd, "w") as file:
+            json.dump({"key": key, "inventory": inventory.to_dict()}, file)
+        os.replace(cache_tmp, cache_file)
+
+        return inventory
+
+    def to_dict(self) -> Dict:
+        return {"versions": self.versions, "names": self.names, "requires": self.requires}
+
+    def __contains__(self, name: str) -> bool:
+        return canonicalize_name(name) in self.versions
+
+    def version(self, name: str) -> Optional[str]:
+        return self.versions.get(canonicalize_name(name))
+
+    def closure(self, roots: Iterable[Tuple[str, Optional[str]]]) -> Set[str]:
+        """
+        Installed distributions reachable from `(name, extra)` roots, roots included.
+        """
+        reachable: Set[str] = set()
+        visited: Set[Tuple[str, str]] = set()
+        stack = [(canonicalize_name(name), canonicalize_name(extra or "")) for name, extra in roots]
+
+        while stack:
+            name, extra = stack.pop()
+            if (name, extra) in visited or name not in self.versions:
+                continue
+            visited.add((name, extra))
+            reachable.add(name)
+
+            edges = self.requires.get(name, {})
+            for dep, dep_extras in edges.get(extra, []) + (edges.get("", []) if extra else []):
+                stack.append((dep, ""))
+                stack.extend((dep, dep_extra) for dep_extra in dep_extras)
+
+        return reachable
+
+    def orphans(
+        self,
+        removed: Iterable[Tuple[str, Optional[str]]],
+        kept: Iterable[Tuple[str, Optional[str]]],
+    ) -> Set[str]:
+        """
+        Dependencies of `removed` packages that nothing else installed, nor any of `kept`
+        requirements, still needs.
+        """
+        removed = list(removed)
+        candidates = self.closure(removed)
+
+        roots = [(name, None) for name in self.versions if name not in candidates]
+        roots.extend(kept)
+        roots.extend((name, None) for name in PROTECTED)
+        needed = self.closure(roots)
+
+        return candidates - needed - {canonicalize_name(name) for name, _ in removed}
+
+    def unneeded(self, kept: Iterable[Tuple[str, Optional[str]]]) -> Set[str]:
+        """
+        Installed distributions not reachable from `kept` requirements.
+        """
+        roots = list(kept) + [(name, None) for name in PROTECTED]
+        return set(self.versions) - self.closure(roots)
+
+    def satisfies(self, pkg: Package) -> bool:
+        version = self.version(pkg.name)
+        if version is None:
+            return False
+
+        specifier_set = get_specifier_set(str(pkg.specifier_set or ""))
+        if not specifier_set.contains(version, prereleases=True):
+            return False
+
+        # all dependencies of the requested extra must be installed too
+        extra_deps = self.requires.get(canonicalize_name(pkg.name), {}).get(
+            canonicalize_name(pkg.suffix or ""), []
+        )
+        return all(dep in self.versions for dep, _ in extra_deps)
@@ -1,15 +1,24 @@
+import hashlib
+import math
+import struct
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterator, List, Optional, Set
 
 from packaging.specifiers import SpecifierSet
 
 
-@dataclass
+@dataclass(frozen=True)
 class Package:
+    # frozen, parsed packages are shared between callers, see `utils.make_package`
     name: str
     suffix: Optional[str] = None
     specifier_set: Optional[SpecifierSet] = None
 
+    def __post_init__(self):
+        object.__setattr__(
+            self, "_hash", hash(self.name + str(self.suffix) + str(self.specifier_set))
+        )
+
     def __eq__(self, other) -> bool:
         return (
             self.name == other.name
@@ -18,10 +27,88 @@ class Package:
         )
 
     def __hash__(self) -> int:
-        return hash(self.name + str(self.suffix) + str(self.specifier_set))
+        return self._hash
 
     def __str__(self) -> str:
         string = f"{self.name}"
         string += f"[{self.suffix}]" if self.suffix else ""
         string += f"{str(self.specifier_set)}" if self.specifier_set else ""
         return string
+
+
+@dataclass
+class InstallPlan:
+    """
+    Packages to install and the requirements file content once they are installed.
+    """
+
+    install: List[Package]
+    requirements: Set[Package]
+
+
+class BloomFilter:
+    """
+    Compact set membership for package names.
+
+    False positives are possible (at roughly `error_rate`), false negatives are not,
+    so a name reported as missing is guaranteed not to be in the filter.
+    """
+
+    HEADER = struct.Struct(">4sBQQQ")
+    # changes whenever HEADER does, older filters are rejected instead of misparsed
+    MAGIC = b"PIR2"
+
+    def __init__(
+        self,
+        size: int,
+        hash_count: int,
+        capacity: int,
+        count: int = 0,
+        bits: Optional[bytearray] = None,
+    ):
+        self.size = size
+        self.hash_count = hash_count
+        self.capacity = capacity
+        self.count = count
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> "BloomFilter":
+        capacity = max(capacity, 1)
+        size = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        hash_count = max(1, round(size / capacity * math.log(2)))
+        return cls(size=size, hash_count=hash_count, capacity=capacity)
+
+    @property
+    def is_full(self) -> bool:
+        # past capacity the false positive rate climbs above `error_rate`
+        return self.count >= self.capacity
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def to_bytes(self) -> bytes:
+        header = self.HEADER.pack(self.MAGIC, self.hash_count, self.size, self.capacity, self.count)
+        return header + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        if len(data) < cls.HEADER.size or data[:4] != cls.MAGIC:
+            raise ValueError("Not a pirg name filter or an older format")
+        _, hash_count, size, capacity, count = cls.HEADER.unpack_from(data)
+        bits = bytearray(data[cls.HEADER.size :])
+        if len(bits) != (size + 7) // 8:
+            raise ValueError("Truncated pirg name filter")
+        return cls(size=size, hash_count=hash_count, capacity=capacity, count=count, bits=bits)
@@ -1,41 +1,64 @@
+import json
 import logging.config
 import os
 import subprocess
 import sys
-import tempfile
 import traceback
 from importlib import metadata
-from typing import List
+from typing import List, Optional, Tuple
 
 import typer
-from requests.exceptions import HTTPError
+from requests.exceptions import ContentDecodingError, HTTPError, RequestException
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+from packaging.version import InvalidVersion, Version
 from typing_extensions import Annotated
 
 from pirg.config import log_config
 from pirg.exceptions import (
     DisabledPipFlag,
     EmptyDatabase,
+    InstallerNotAvailable,
+    NoCompatibleVersion,
+    UnknownPackage,
+    WrongHedgeDelay,
+    WrongIndexPolicy,
     WrongPkgName,
     WrongSpecifierSet,
 )
-from .models import Package
+from .database import (
+    create_db,
+    current_snapshot,
+    get_cache_dir,
+    get_db_dir,
+    get_index_dir,
+    read_header,
+)
+from .indexes import INDEX_STATS_FILENAME, IndexPool, IndexStats, get_index_pool
+from .installers import get_installer
+from .inventory import Inventory, get_inventory_file
+from .resolver import Resolver
+from .search_index import SearchCache, SearchIndex
 from .utils import (
+    PYPI_SIMPLE_URL,
+    PY_VERSION,
+    SEARCH_CUTOFF,
+    SEARCH_LIMIT,
+    canonicalize_name,
     check_for_pip_args,
     check_for_requirements_file,
     check_if_pypi_simple_is_modified,
-    create_db,
     create_requirements,
-    fuzzy_search,
-    get_package,
     get_pypi_simple_data,
     load_requirements_file,
-    parse_package_name,
+    make_package,
+    parse_python_versions,
     run_subprocess,
 )
 
-TEMP_FILENAME = "pirg_pkg_db.txt"
+SEARCH_CACHE_FILENAME = "search_cache.json"
 __version__ = metadata.version("pirg")
-logging.config.dictConfig(log_config)
 
 main = typer.Typer()
 
@@ -46,6 +69,26 @@ def version_callback(value: bool):
         raise typer.Exit()
 
 
+def python_versions_callback(value: Optional[str]) -> Optional[List[Version]]:
+    if not value:
+        return None
+    try:
+        return parse_python_versions(value)
+    except InvalidVersion as e:
+        raise typer.BadParameter(str(e))
+
+
+PYTHON_HELP = "Comma separated python versions to resolve for, e.g. 3.9,3.12"
+INSTALLER_HELP = "Installer backend: pip, uv, auto or dry-run (default: $PIRG_INSTALLER or pip)"
+INDEX_HELP = "Index URL, repeatable, in order of preference (default: $PIRG_INDEX_URLS or PyPI)"
+INDEX_POLICY_HELP = "failover or hedge (default: $PIRG_INDEX_POLICY or failover)"
+
+
+def index_pool(index: Optional[List[str]], index_policy: Optional[str]) -> IndexPool:
+    stats_file = os.path.join(get_cache_dir(), INDEX_STATS_FILENAME)
+    return get_index_pool(index, index_policy, stats_file=stats_file)
+
+
 @main.callback()
 def common(
     ctx: typer.Context,
@@ -56,7 +99,8 @@ def common(
         callback=version_callback,
     ),
 ):
-    pass
+    # configured by the CLI only, importing pirg leaves logging alone
+    logging.config.dictConfig(log_config)
 
 
 @main.command()
@@ -64,12 +108,20 @@ def install(
     package_names: Annotated[List[str], typer.Argument(help="List of packages")] = None,
     requirements_path: Annotated[str, typer.Option()] = check_for_requirements_file(),
     update_all: Annotated[bool, typer.Option()] = False,
+    python: Annotated[
+        Optional[str], typer.Option(help=PYTHON_HELP, callback=python_versions_callback)
+    ] = None,
+    installer: Annotated[Optional[str], typer.Option(help=INSTALLER_HELP)] = None,
+    index: Annotated[Optional[List[str]], typer.Option(help=INDEX_HELP)] = None,
+    index_policy: Annotated[Optional[str], typer.Option(help=INDEX_POLICY_HELP)] = None,
     log_level: Annotated[str, typer.Option(help="Set the log level")] = "INFO",
 ) -> None:
     """
     Installs [package_names] and puts them in the requirements file on [requirements_path] location
 
     You can pass additional `pip install` arguments after "--".
+    With --python, packages are pinned to the newest release compatible with all listed versions.
+    Versions are looked up on the --index URLs, pip still installs from its own configured index.
 
     Example:
         `pirg install torch -- --index-url https://download.pytorch.org/whl/cu118`
@@ -86,43 +138,48 @@ def install(
         package_names = set(package_names) - pip_args
 
         current_pkgs = load_requirements_file(requirements_loc=requirements_path)
-        new_pkgs = {get_package(package_name=pkg) for pkg in package_names}
-        new_pkgs = new_pkgs - current_pkgs
-
-        if update_all:
-            # all pkgs update
-            update_current_pkgs = {get_package(package_name=pkg.name) for pkg in current_pkgs}
-            update_current_pkgs = new_pkgs.union(update_current_pkgs)
-            new_pkgs = update_current_pkgs
-        else:
-            # one pkg update
-            # check if it has same name but different version
-            update_current_pkgs = {c for c in current_pkgs for n in new_pkgs if c.name != n.name}
-            update_current_pkgs.update(new_pkgs)
-
-        ins_pkgs = [f"{str(p)}" for p in new_pkgs]
-        logging.debug(f"ins_pkgs: {ins_pkgs}")
-
-        skip_pip_args = {"-h", "--help"}
-        if not ins_pkgs and not update_all and not bool(skip_pip_args & pip_args):
-            logging.info("Nothing to install")
-            return
-
-        run_subprocess(pkgs=ins_pkgs, pip_command="install", pip_args=list(pip_args))
-        create_requirements(package_names=update_current_pkgs, requirements_loc=requirements_path)
+        with Resolver(
+            index_urls=index, index_policy=index_policy, python_versions=python
+        ) as resolver:
+            plan = resolver.plan_install(package_names, current_pkgs, update_all=update_all)
+
+            ins_pkgs = [str(p) for p in plan.install]
+            logging.debug(f"ins_pkgs: {ins_pkgs}")
+
+            skip_pip_args = {"-h", "--help"}
+            if not ins_pkgs and not update_all and not bool(skip_pip_args & pip_args):
+                logging.info("Nothing to install")
+                return
+
+            run_subprocess(
+                pkgs=ins_pkgs,
+                pip_command="install",
+                pip_args=list(pip_args),
+                installer=get_installer(installer),
+            )
+            resolver.write_requirements(plan.requirements, requirements_path)
     except FileNotFoundError as e:
         traceback.print_exc()
         sys.exit(e.errno)
     except HTTPError as e:
-        pkg_name = e.args[0].split()[-1].split("/")[-2]
-        logging.error(f"Failed to find the latest version of {pkg_name} on PyPI")
+        pkg_name = getattr(e, "package_name", None) or e.response.url
+        logging.error(f"Failed to find the latest version of {pkg_name} on the package index")
         traceback.print_exc()
         sys.exit(e.response.status_code)
     except subprocess.CalledProcessError as e:
         logging.error("Failed to install packages")
         traceback.print_exc()
         sys.exit(e.returncode)
-    except (DisabledPipFlag, WrongPkgName, WrongSpecifierSet) as e:
+    except (
+        DisabledPipFlag,
+        InstallerNotAvailable,
+        NoCompatibleVersion,
+        UnknownPackage,
+        WrongHedgeDelay,
+        WrongIndexPolicy,
+        WrongPkgName,
+        WrongSpecifierSet,
+    ) as e:
         logging.error(str(e))
         sys.exit(e.exit_code)
 
@@ -132,12 +189,19 @@ def uninstall(
     package_names: Annotated[List[str], typer.Argument()] = None,
     requirements_path: Annotated[str, typer.Option()] = check_for_requirements_file(),
     delete_all: Annotated[bool, typer.Option()] = False,
+    orphans: Annotated[
+        bool, typer.Option(help="Also remove dependencies nothing else needs anymore")
+    ] = False,
+    installer: Annotated[Optional[str], typer.Option(help=INSTALLER_HELP)] = None,
     log_level: Annotated[str, typer.Option(help="Set the log level")] = "INFO",
 ) -> None:
     """
     Uninstalls [package_names] and removes them from the requirements file on [requirements_path] location
 
     You can pass additional `pip uninstall` arguments after "--".
+    Everything, orphaned dependencies included, is removed with a single pip call.
+    Packages are looked up in the current environment (`sys.path`) first, the ones that are
+    not installed there are only removed from the requirements file.
 
     Example:
         `pirg uninstall torch -- --yes`
@@ -153,15 +217,15 @@ def uninstall(
         logging.debug(f"pip_args: {pip_args}")
         package_names = set(package_names) - pip_args
 
-        package_names = [parse_package_name(val) for val in package_names]
-        new_pkgs = set([Package(n, sf, ss) for n, sf, ss in package_names])
+        new_pkgs = {make_package(val) for val in package_names}
         current_pkgs = load_requirements_file(requirements_loc=requirements_path)
 
         if delete_all:
             new_pkgs.update(current_pkgs)
 
         # repopulate version from requirements.txt
-        new_pkgs = {c for c in current_pkgs for n in new_pkgs if c.name == n.name}
+        rm_names = {canonicalize_name(p.name) for p in new_pkgs}
+        new_pkgs = {c for c in current_pkgs if canonicalize_name(c.name) in rm_names}
         current_pkgs = current_pkgs - new_pkgs
 
         rm_pkgs = [p.name for p in new_pkgs]
@@ -171,7 +235,25 @@ def uninstall(
             logging.info("Nothing to remove")
             return
 
-        run_subprocess(pkgs=rm_pkgs, pip_command="uninstall", pip_args=list(pip_args))
+        inventory = Inventory.load(get_inventory_file(get_cache_dir()))
+        if orphans:
+            kept = [(p.name, p.suffix) for p in current_pkgs]
+            orphan_names = inventory.orphans([(p.name, p.suffix) for p in new_pkgs], kept=kept)
+            orphan_names = sorted(inventory.names[name] for name in orphan_names)
+            logging.info(f"Orphaned dependencies: {orphan_names}")
+            rm_pkgs += orphan_names
+
+        # pip would only warn about packages that are not installed
+        logging.debug(f"Not installed: {[p for p in rm_pkgs if p not in inventory]}")
+        rm_pkgs = [p for p in rm_pkgs if p in inventory]
+
+        if rm_pkgs or skip_pip_args & pip_args:
+            run_subprocess(
+                pkgs=rm_pkgs,
+                pip_command="uninstall",
+                pip_args=list(pip_args),
+                installer=get_installer(installer),
+            )
         create_requirements(package_names=current_pkgs, requirements_loc=requirements_path)
     except FileNotFoundError as e:
         traceback.print_exc()
@@ -185,7 +267,173 @@ def uninstall(
         logging.error("Failed to remove packages")
         traceback.print_exc()
         sys.exit(e.returncode)
-    except (DisabledPipFlag, WrongPkgName, WrongSpecifierSet) as e:
+    except (DisabledPipFlag, InstallerNotAvailable, WrongPkgName, WrongSpecifierSet) as e:
+        logging.error(str(e))
+        sys.exit(e.exit_code)
+
+
+@main.command()
+def sync(
+    requirements_path: Annotated[str, typer.Option()] = check_for_requirements_file(),
+    prune: Annotated[
+        bool, typer.Option(help="Remove installed packages no requirement needs")
+    ] = False,
+    installer: Annotated[Optional[str], typer.Option(help=INSTALLER_HELP)] = None,
+    log_level: Annotated[str, typer.Option(help="Set the log level")] = "INFO",
+) -> None:
+    """
+    Makes the environment match the requirements file on [requirements_path] location
+
+    Missing packages and packages with a version outside their requirement are installed with
+    a single pip call. With --prune, packages that no requirement needs are removed with one more.
+    pip, setuptools, wheel and pirg with its dependencies are never removed.
+    You can pass additional `pip install` arguments after "--".
+
+    Example:
+        `pirg sync --prune`
+    """
+    log_level = log_level.upper()
+    log_level = getattr(logging, log_level)
+    logging.getLogger().setLevel(log_level)
+    logging.debug(f"argv: {sys.argv}")
+
+    try:
+        pip_args = check_for_pip_args()
+        logging.debug(f"pip_args: {pip_args}")
+
+        current_pkgs = load_requirements_file(requirements_loc=requirements_path)
+        inventory = Inventory.load(get_inventory_file(get_cache_dir()))
+
+        ins_pkgs = sorted(str(p) for p in current_pkgs if not inventory.satisfies(p))
+        rm_pkgs = []
+        if prune:
+            unneeded = inventory.unneeded((p.name, p.suffix) for p in current_pkgs)
+            rm_pkgs = sorted(inventory.names[name] for name in unneeded)
+
+        if not ins_pkgs and not rm_pkgs:
+            logging.info("Environment is in sync")
+            return
+
+        backend = get_installer(installer)
+        if ins_pkgs:
+            run_subprocess(
+                pkgs=ins_pkgs,
+                pip_command="install",
+                pip_args=list(pip_args),
+                installer=backend,
+            )
+        if rm_pkgs:
+            run_subprocess(
+                pkgs=rm_pkgs, pip_command="uninstall", pip_args=["-y"], installer=backend
+            )
+    except FileNotFoundError as e:
+        traceback.print_exc()
+        sys.exit(e.errno)
+    except subprocess.CalledProcessError as e:
+        logging.error("Failed to sync packages")
+        traceback.print_exc()
+        sys.exit(e.returncode)
+    except (DisabledPipFlag, InstallerNotAvailable, WrongPkgName) as e:
+        logging.error(str(e))
+        sys.exit(e.exit_code)
+
+
+@main.command()
+def outdated(
+    requirements_path: Annotated[str, typer.Option()] = check_for_requirements_file(),
+    output_json: Annotated[bool, typer.Option("--json", help="Print report as JSON")] = False,
+    check: Annotated[
+        bool, typer.Option(help="Exit with code 1 if any package is outdated or can't be checked")
+    ] = False,
+    python: Annotated[
+        Optional[str], typer.Option(help=PYTHON_HELP, callback=python_versions_callback)
+    ] = None,
+    index: Annotated[Optional[List[str]], typer.Option(help=INDEX_HELP)] = None,
+    index_policy: Annotated[Optional[str], typer.Option(help=INDEX_POLICY_HELP)] = None,
+    log_level: Annotated[str, typer.Option(help="Set the log level")] = "INFO",
+) -> None:
+    """
+    Lists pinned packages from the requirements file on [requirements_path] location that have newer releases
+
+    Nothing is installed. Checks run concurrently and unchanged projects are revalidated from the local cache.
+
+    Example:
+        `pirg outdated --check`
+    """
+    log_level = log_level.upper()
+    log_level = getattr(logging, log_level)
+    logging.getLogger().setLevel(log_level)
+    logging.debug(f"argv: {sys.argv}")
+
+    try:
+        current_pkgs = load_requirements_file(requirements_loc=requirements_path)
+        with Resolver(
+            index_urls=index, index_policy=index_policy, python_versions=python
+        ) as resolver:
+            report = resolver.outdated(current_pkgs)
+        outdated_pkgs = [row for row in report if row["outdated"]]
+        failed_pkgs = [row for row in report if row["error"]]
+
+        if output_json:
+            typer.echo(json.dumps(report, indent=2))
+        elif outdated_pkgs:
+            table = Table("Package", "Current", "Latest")
+            for row in outdated_pkgs:
+                table.add_row(row["name"], row["current"], row["latest"])
+            Console().print(table)
+        elif not failed_pkgs:
+            logging.info("All packages are up-to-date")
+
+        if check and (outdated_pkgs or failed_pkgs):
+            sys.exit(1)
+    except FileNotFoundError as e:
+        traceback.print_exc()
+        sys.exit(e.errno)
+    except (WrongHedgeDelay, WrongIndexPolicy, WrongPkgName, WrongSpecifierSet) as e:
+        logging.error(str(e))
+        sys.exit(e.exit_code)
+
+
+@main.command()
+def resolve(
+    package_names: Annotated[List[str], typer.Argument(help="List of packages")] = None,
+    python: Annotated[
+        Optional[str], typer.Option(help=PYTHON_HELP, callback=python_versions_callback)
+    ] = None,
+    output_json: Annotated[bool, typer.Option("--json", help="Print result as JSON")] = False,
+    index: Annotated[Optional[List[str]], typer.Option(help=INDEX_HELP)] = None,
+    index_policy: Annotated[Optional[str], typer.Option(help=INDEX_POLICY_HELP)] = None,
+    log_level: Annotated[str, typer.Option(help="Set the log level")] = "INFO",
+) -> None:
+    """
+    Shows which release of [package_names] would be pinned for each python version
+
+    Metadata is fetched once per package, whatever the number of python versions.
+    The "all" column is the newest release compatible with every listed version.
+
+    Example:
+        `pirg resolve numpy pandas --python 3.9,3.10,3.11,3.12`
+    """
+    log_level = log_level.upper()
+    log_level = getattr(logging, log_level)
+    logging.getLogger().setLevel(log_level)
+    logging.debug(f"argv: {sys.argv}")
+
+    try:
+        python_versions = python or [PY_VERSION]
+        with Resolver(index_urls=index, index_policy=index_policy) as resolver:
+            matrix = resolver.resolve(package_names or [], python_versions=python_versions)
+
+        if output_json:
+            typer.echo(json.dumps(matrix, indent=2))
+            return
+
+        table = Table("Package", *[str(py) for py in python_versions], "all")
+        for row in matrix:
+            pins = [row["pins"][str(py)] or "-" for py in python_versions]
+            table.add_row(escape(row["name"]), *pins, row["all"] or "-")
+        Console().print(table)
+    except (WrongHedgeDelay, WrongIndexPolicy, WrongPkgName) as e:
         logging.error(str(e))
         sys.exit(e.exit_code)
 
@@ -193,6 +441,8 @@ def uninstall(
 @main.command()
 def search(
     user_input: Annotated[str, typer.Argument()] = None,
+    limit: Annotated[int, typer.Option(help="Maximum number of results")] = SEARCH_LIMIT,
+    cutoff: Annotated[float, typer.Option(help="Minimum similarity, 0-1")] = SEARCH_CUTOFF,
     log_level: Annotated[str, typer.Option(help="Set the log level")] = "INFO",
 ) -> None:
     """
@@ -207,24 +457,23 @@ def search(
     logging.debug(f"argv: {sys.argv}")
 
     try:
-        temp_dir = tempfile.gettempdir()
-        filename = os.path.join(temp_dir, TEMP_FILENAME)
-
-        if not os.path.exists(filename):
-            raise FileNotFoundError("Package names file doesn't exist. Please run `initdb` first.")
+        snapshot = current_snapshot(get_db_dir())
 
-        if check_if_pypi_simple_is_modified():
-            # fmt: off
-            logging.info("Current list of package names is out of date. Please update with `initdb --update`")
-            # fmt: on
+        if snapshot is not None:
+            header = read_header(snapshot)
+            index_url = header.get("index") or PYPI_SIMPLE_URL
+            if check_if_pypi_simple_is_modified(url=index_url, etag=header.get("etag")):
+                # fmt: off
+                logging.info("Current list of package names is out of date. Please update with `initdb --update`")
+                # fmt: on
 
-        with open(filename, "r") as file:
-            package_names = [line.strip() for line in file]
+        # results of a repeated query come from the cache without loading the database
+        search_cache = SearchCache(os.path.join(get_cache_dir(), SEARCH_CACHE_FILENAME))
+        with Resolver(search_cache=search_cache) as resolver:
+            search_output = resolver.search(user_input, limit, cutoff)
 
-        indexed_package_names = {name.lower(): name for name in package_names}
-        search_output = fuzzy_search(user_input, indexed_package_names)
         logging.info(f"Search result: {search_output}")
-    except EmptyDatabase as e:
+    except (EmptyDatabase, WrongHedgeDelay, WrongIndexPolicy) as e:
         logging.error(str(e))
         sys.exit(e.exit_code)
     except FileNotFoundError as e:
@@ -239,11 +488,16 @@ def search(
 @main.command()
 def initdb(
     update: Annotated[bool, typer.Option()] = False,
+    index: Annotated[Optional[List[str]], typer.Option(help=INDEX_HELP)] = None,
+    index_policy: Annotated[Optional[str], typer.Option(help=INDEX_POLICY_HELP)] = None,
     log_level: Annotated[str, typer.Option(help="Set the log level")] = "INFO",
 ) -> None:
     """
     Initialize or update current package names list
 
+    The package index is downloaded compressed. An interrupted download continues where it
+    stopped on the next run. With several --index URLs, the next one is used when an index fails.
+
     Example:
         `pirg initdb`
     """
@@ -253,23 +507,44 @@ def initdb(
     logging.debug(f"argv: {sys.argv}")
 
     try:
-        temp_dir = tempfile.gettempdir()
-        filename = os.path.join(temp_dir, TEMP_FILENAME)
-        logging.debug(f"Database location: {filename}")
+        db_dir = get_db_dir()
+        snapshot = current_snapshot(db_dir)
+        logging.debug(f"Database location: {db_dir}")
 
-        if not update and os.path.exists(filename):
+        if not update and snapshot:
             logging.info("Database already initialized")
             return
 
-        new_version = check_if_pypi_simple_is_modified()
-        if update and not new_version:
+        header = read_header(snapshot) if snapshot else {}
+
+        def download(index_url: str) -> Optional[Tuple[str, Optional[str], str]]:
+            # ETag of another index never matches
+            same_index = (header.get("index") or PYPI_SIMPLE_URL) == index_url
+            etag = header.get("etag") if same_index else None
+            if update and not check_if_pypi_simple_is_modified(url=index_url, etag=etag):
+                return None
+
+            logging.info(f"Downloading data from {index_url}")
+            data, etag = get_pypi_simple_data(
+                url=index_url,
+                partial_file=os.path.join(get_cache_dir(), "download", "simple.partial"),
+                show_progress=True,
+            )
+            return data, etag, index_url
+
+        # downloads are never hedged, a second copy of the index would only compete for bandwidth
+        with index_pool(index, index_policy) as pool:
+            downloaded = pool.failover(download)
+
+        if downloaded is None:
             logging.info("Database is up-to-date")
             return
 
-        logging.info("Downloading data")
-        data = get_pypi_simple_data()
-
-        create_db(filename, data)
+        data, etag, index_url = downloaded
+        snapshot = create_db(
+            db_dir, data, etag, search_index=SearchIndex(get_index_dir()), index_url=index_url
+        )
+        logging.debug(f"Database snapshot: {snapshot}")
         logging.info("Database initialized")
     except FileNotFoundError as e:
         traceback.print_exc()
@@ -278,6 +553,59 @@ def initdb(
         logging.error(e)
         traceback.print_exc()
         sys.exit(e.response.status_code)
+    except ContentDecodingError as e:
+        logging.error(f"{e}. Run `initdb` again to download it anew")
+        sys.exit(1)
+    except RequestException as e:
+        logging.error(f"{e}. Run `initdb` again to resume the download")
+        sys.exit(1)
+    except (WrongHedgeDelay, WrongIndexPolicy) as e:
+        logging.error(str(e))
+        sys.exit(e.exit_code)
+
+
+@main.command()
+def indexes(
+    output_json: Annotated[bool, typer.Option("--json", help="Print statistics as JSON")] = False,
+    log_level: Annotated[str, typer.Option(help="Set the log level")] = "INFO",
+) -> None:
+    """
+    Shows request statistics of the package indexes used so far
+
+    Use them to order --index URLs or $PIRG_INDEX_URLS, fastest and most reliable first.
+    "recent" is a moving average that follows the latest requests.
+
+    Example:
+        `pirg indexes`
+    """
+    log_level = log_level.upper()
+    log_level = getattr(logging, log_level)
+    logging.getLogger().setLevel(log_level)
+    logging.debug(f"argv: {sys.argv}")
+
+    stats = IndexStats(os.path.join(get_cache_dir(), INDEX_STATS_FILENAME)).load()
+
+    if output_json:
+        typer.echo(json.dumps(stats, indent=2))
+        return
+
+    if not stats:
+        logging.info("No index statistics yet")
+        return
+
+    table = Table("Index", "Requests", "Failures", "Average", "Recent")
+    for index_url, entry in stats.items():
+        answered = entry["requests"] - entry["failures"]
+        average = f"{entry['total_seconds'] / answered:.3f}s" if answered else "-"
+        recent = entry["recent_seconds"]
+        table.add_row(
+            escape(index_url),
+            str(entry["requests"]),
+            str(entry["failures"]),
+            average,
+            f"{recent:.3f}s" if recent is not None else "-",
+        )
+    Console().print(table)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,310 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar, Union
+
+from packaging.version import Version
+
+from .database import (
+    check_package_names,
+    current_snapshot,
+    get_cache_dir,
+    load_name_filter,
+    load_search_index,
+    read_header,
+)
+from .indexes import DEFAULT_INDEX_URL, INDEX_STATS_FILENAME, get_index_pool
+from .models import BloomFilter, InstallPlan, Package
+from .search_index import SearchCache, SearchIndex, normalize_query
+from .utils import (
+    PY_VERSION,
+    SEARCH_CUTOFF,
+    SEARCH_LIMIT,
+    canonicalize_name,
+    check_outdated,
+    create_requirements,
+    create_session,
+    fetch_packages_data,
+    fuzzy_search,
+    get_pinned_version,
+    parse_package_name,
+    resolve_matrix,
+    select_specifier_set,
+)
+
+METADATA_TTL = 300
+METADATA_MAX_ENTRIES = 1024
+MAX_WORKERS = 16
+
+T = TypeVar("T")
+
+
+class Resolver:
+    """
+    Programmatic entry point to pirg, keeps its state warm between calls.
+
+    Holds the HTTP connection pool, the index pool with its latency statistics, project
+    metadata fetched in the last `metadata_ttl` seconds and the name filter and search index of
+    the current database snapshot. Metadata older than that is revalidated against the on-disk cache
+    with a conditional request, at most `metadata_max_entries` projects are kept, least
+    recently used are dropped first. Index statistics are saved after every fetch. Methods
+    raise pirg exceptions and `requests` errors, nothing calls `sys.exit`. Every method has
+    an `a`-prefixed coroutine twin running it on a thread pool, e.g.
+    `await resolver.aresolve(["numpy"])`.
+
+        with Resolver(index_urls=["https://pypi.org/simple/"]) as resolver:
+            plan = resolver.plan_install(["requests"])
+            resolver.write_requirements(plan.requirements, "requirements.txt")
+
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        index_urls: Optional[List[str]] = None,
+        index_policy: Optional[str] = None,
+        python_versions: Optional[List[Version]] = None,
+        search_cache: Optional[SearchCache] = None,
+        metadata_ttl: float = METADATA_TTL,
+        metadata_max_entries: int = METADATA_MAX_ENTRIES,
+        max_workers: int = MAX_WORKERS,
+    ):
+        self.cache_dir = cache_dir or get_cache_dir()
+        self.python_versions = python_versions
+        self.search_cache = search_cache
+        self.metadata_ttl = metadata_ttl
+        self.metadata_max_entries = metadata_max_entries
+        self.max_workers = max_workers
+
+        stats_file = os.path.join(self.cache_dir, INDEX_STATS_FILENAME)
+        self.pool = get_index_pool(index_urls, index_policy, stats_file=stats_file)
+        self.session = create_session(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._metadata: "OrderedDict[str, List]" = OrderedDict()
+        # per cache key: [snapshot version, value]
+        self._snapshot_cache: Dict[str, List] = {}
+
+    def __enter__(self) -> "Resolver":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.session.close()
+        self.pool.stats.save()
+
+    @property
+    def db_dir(self) -> str:
+        return os.path.join(self.cache_dir, "db")
+
+    def fetch(self, pkg_names: Iterable[str]) -> Dict[str, Union[Dict, Exception]]:
+        """
+        Metadata of `pkg_names`, failures in place of the data, see `fetch_packages_data`.
+        """
+        results = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for name in set(pkg_names):
+                key = canonicalize_name(name)
+                cached = self._metadata.get(key)
+                if cached and now - cached[0] < self.metadata_ttl:
+                    self._metadata.move_to_end(key)
+                    results[name] = cached[1]
+                else:
+                    self._metadata.pop(key, None)
+                    missing.append(name)
+
+        fetched = fetch_packages_data(
+            missing,
+            cache_dir=os.path.join(self.cache_dir, "json"),
+            max_workers=self.max_workers,
+            pool=self.pool,
+            session=self.session,
+        )
+        with self._lock:
+            for name, package_data in fetched.items():
+                if not isinstance(package_data, Exception):
+                    self._metadata[canonicalize_name(name)] = [now, package_data]
+            while len(self._metadata) > self.metadata_max_entries:
+                self._metadata.popitem(last=False)
+        # a long-lived resolver that is never closed keeps its statistics too
+        self.pool.stats.save()
+
+        results.update(fetched)
+        return results
+
+    def get_packages(
+        self,
+        package_names: Iterable[str],
+        python_versions: Optional[List[Version]] = None,
+    ) -> List[Package]:
+        """
+        Pins `package_names` like `get_package`, fetching all of them concurrently.
+        Raises the error of the first package, in the given order, that can't be pinned.
+        """
+        python_versions = python_versions or self.python_versions
+        parsed = [parse_package_name(package_name) for package_name in package_names]
+        results = self.fetch(name for name, _, _ in parsed)
+
+        packages = []
+        for name, suffix, pkg_specifier_set in parsed:
+            package_data = results[name]
+            if isinstance(package_data, Exception):
+                raise package_data
+            specifier_set = select_specifier_set(package_data, pkg_specifier_set, python_versions)
+            packages.append(Package(name=name, suffix=suffix, specifier_set=specifier_set))
+
+        return packages
+
+    def plan_install(
+        self,
+        package_names: Iterable[str],
+        requirements: Iterable[Package] = (),
+        update_all: bool = False,
+        python_versions: Optional[List[Version]] = None,
+    ) -> InstallPlan:
+        """
+        What `install` would do: packages to install and the new content of the requirements
+        file. Names unknown to the local database are rejected before the index is asked,
+        unless the database was built from another index than the first one of the pool.
+        """
+        package_names = list(package_names)
+        check_package_names(
+            package_names,
+            snapshot=current_snapshot(self.db_dir),
+            load_filter=self._load_name_filter,
+            load_names=self._load_search_index,
+        )
+
+        current_pkgs = set(requirements)
+        new_pkgs = set(self.get_packages(package_names, python_versions)) - current_pkgs
+
+        if update_all:
+            updated = self.get_packages([pkg.name for pkg in current_pkgs], python_versions)
+            new_pkgs = new_pkgs.union(updated)
+            return InstallPlan(install=sorted(new_pkgs, key=str), requirements=new_pkgs)
+
+        # same name with another version is replaced
+        new_names = {canonicalize_name(pkg.name) for pkg in new_pkgs}
+        kept = {pkg for pkg in current_pkgs if canonicalize_name(pkg.name) not in new_names}
+        return InstallPlan(install=sorted(new_pkgs, key=str), requirements=kept | new_pkgs)
+
+    def _load_name_filter(self, snapshot: str) -> Optional[BloomFilter]:
+        def load(snapshot: str) -> Optional[BloomFilter]:
+            # a mirror can serve private packages the database built from PyPI doesn't list
+            db_index = read_header(snapshot).get("index") or DEFAULT_INDEX_URL
+            if db_index.rstrip("/") != self.pool.urls[0].rstrip("/"):
+                return None
+            return load_name_filter(snapshot)
+
+        return self._snapshot_cached("name_filter", snapshot, load)
+
+    def write_requirements(self, requirements: Iterable[Package], requirements_loc: str) -> None:
+        create_requirements(package_names=set(requirements), requirements_loc=requirements_loc)
+
+    def resolve(
+        self,
+        package_names: Iterable[str],
+        python_versions: Optional[List[Version]] = None,
+    ) -> List[Dict]:
+        """
+        Pins per python version, see `resolve_matrix`.
+        """
+        python_versions = python_versions or self.python_versions or [PY_VERSION]
+        package_names = list(package_names)
+        fetched = self.fetch(parse_package_name(name)[0] for name in package_names)
+        return resolve_matrix(package_names, python_versions, fetched=fetched)
+
+    def outdated(
+        self,
+        requirements: Iterable[Package],
+        python_versions: Optional[List[Version]] = None,
+    ) -> List[Dict[str, Optional[str]]]:
+        """
+        Pinned `requirements` with newer releases, see `check_outdated`.
+        """
+        requirements = list(requirements)
+        fetched = self.fetch(pkg.name for pkg in requirements if get_pinned_version(pkg))
+        return check_outdated(
+            requirements,
+            python_versions=python_versions or self.python_versions,
+            fetched=fetched,
+        )
+
+    def _snapshot_cached(self, key: str, snapshot: str, load: Callable[[str], T]) -> T:
+        version = os.path.basename(snapshot)
+        with self._lock:
+            cached = self._snapshot_cache.get(key)
+            if cached and cached[0] == version:
+                return cached[1]
+
+        value = load(snapshot)
+        with self._lock:
+            self._snapshot_cache[key] = [version, value]
+        return value
+
+    def _load_search_index(self, snapshot: str) -> Dict[str, str]:
+        search_index = SearchIndex(os.path.join(self.cache_dir, "index"))
+        return self._snapshot_cached(
+            "search_index", snapshot, lambda snapshot: load_search_index(snapshot, search_index)
+        )
+
+    def search(
+        self,
+        query: str,
+        limit: int = SEARCH_LIMIT,
+        cutoff: float = SEARCH_CUTOFF,
+    ) -> List[str]:
+        """
+        Package names similar to `query`. The search index is loaded once per database
+        snapshot, results are reused from `search_cache` when there is one.
+        """
+        snapshot = current_snapshot(self.db_dir)
+        if snapshot is None:
+            raise FileNotFoundError("Package names file doesn't exist. Please run `initdb` first.")
+
+        version = os.path.basename(snapshot)
+        query = normalize_query(query)
+        if self.search_cache is not None:
+            search_output = self.search_cache.get(query, limit, cutoff, version)
+            if search_output is not None:
+                return search_output
+
+        search_output = fuzzy_search(query, self._load_search_index(snapshot), limit, cutoff)
+        if self.search_cache is not None:
+            self.search_cache.put(query, limit, cutoff, version, search_output)
+        return search_output
+
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def afetch(self, *args, **kwargs) -> Dict[str, Union[Dict, Exception]]:
+        return await self._run(self.fetch, *args, **kwargs)
+
+    async def aget_packages(self, *args, **kwargs) -> List[Package]:
+        return await self._run(self.get_packages, *args, **kwargs)
+
+    async def aplan_install(self, *args, **kwargs) -> InstallPlan:
+        return await self._run(self.plan_install, *args, **kwargs)
+
+    async def awrite_requirements(self, *args, **kwargs) -> None:
+        return await self._run(self.write_requirements, *args, **kwargs)
+
+    async def aresolve(self, *args, **kwargs) -> List[Dict]:
+        return await self._run(self.resolve, *args, **kwargs)
+
+    async def aoutdated(self, *args, **kwargs) -> List[Dict[str, Optional[str]]]:
+        return await self._run(self.outdated, *args, **kwargs)
+
+    async def asearch(self, *args, **kwargs) -> List[str]:
+        return await self._run(self.search, *args, **kwargs)
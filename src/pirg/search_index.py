@@ -0,0 +1,183 @@
+import json
+import logging
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional
+
+MANIFEST_FILENAME = "MANIFEST"
+SEGMENT_PREFIX = "seg-"
+MAX_SEGMENTS = 8
+LOAD_RETRIES = 3
+MAX_CACHED_QUERIES = 256
+
+
+class SearchIndex:
+    """
+    Lowercase name -> package name map used by `search`, stored as segment files.
+
+    Every update is appended as a new immutable segment with `+Name` additions and
+    `-name` tombstones, segments are replayed in order on load. MANIFEST lists the
+    live segments and the database version they add up to, and is swapped atomically,
+    so readers never see a half applied update. Once there are more than
+    `max_segments` segments, they are compacted into one.
+    """
+
+    def __init__(self, index_dir: str, max_segments: int = MAX_SEGMENTS):
+        self.index_dir = index_dir
+        self.max_segments = max_segments
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(os.path.join(self.index_dir, MANIFEST_FILENAME), "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {"version": None, "segments": []}
+
+    def _write_manifest(self, version: str, segments: List[str]) -> None:
+        fd, manifest_tmp = tempfile.mkstemp(prefix=".manifest-", dir=self.index_dir)
+        with os.fdopen(fd, "w") as file:
+            json.dump({"version": version, "segments": segments}, file)
+        os.replace(manifest_tmp, os.path.join(self.index_dir, MANIFEST_FILENAME))
+
+    def _write_segment(self, added: Iterable[str], removed: Iterable[str]) -> str:
+        os.makedirs(self.index_dir, exist_ok=True)
+        fd, segment = tempfile.mkstemp(prefix=SEGMENT_PREFIX, suffix=".txt", dir=self.index_dir)
+        with os.fdopen(fd, "w") as file:
+            # tombstones first, so a name that only changed case survives
+            for name in removed:
+                file.write(f"-{name.lower()}\n")
+            for name in added:
+                file.write(f"+{name}\n")
+        return os.path.basename(segment)
+
+    def _remove_unused_segments(self, segments: List[str]) -> None:
+        for entry in os.scandir(self.index_dir):
+            if entry.name.startswith(SEGMENT_PREFIX) and entry.name not in segments:
+                os.remove(entry.path)
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._read_manifest()["version"]
+
+    def load(self, version: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """
+        Replays all segments. Returns None if the index doesn't match `version`.
+        """
+        for _ in range(LOAD_RETRIES):
+            manifest = self._read_manifest()
+            if manifest["version"] is None or (version and manifest["version"] != version):
+                return None
+
+            indexed_package_names = {}
+            try:
+                for segment in manifest["segments"]:
+                    with open(os.path.join(self.index_dir, segment), "r") as file:
+                        for line in file:
+                            op, name = line[0], line[1:].rstrip("\n")
+                            if op == "+":
+                                indexed_package_names[name.lower()] = name
+                            else:
+                                indexed_package_names.pop(name, None)
+            except FileNotFoundError:
+                # compacted while reading, start over from the new manifest
+                continue
+
+            return indexed_package_names
+
+        return None
+
+    def rebuild(self, package_names: Iterable[str], version: str) -> None:
+        segment = self._write_segment(package_names, [])
+        self._write_manifest(version, [segment])
+        self._remove_unused_segments([segment])
+
+    def apply(self, added: Iterable[str], removed: Iterable[str], version: str) -> None:
+        manifest = self._read_manifest()
+        segments = manifest["segments"] + [self._write_segment(added, removed)]
+        self._write_manifest(version, segments)
+        logging.debug(f"Search index segments: {len(segments)}")
+
+        if len(segments) > self.max_segments:
+            self.compact()
+
+    def compact(self) -> None:
+        manifest = self._read_manifest()
+        indexed_package_names = self.load(manifest["version"])
+        if indexed_package_names is None:
+            return
+
+        logging.debug(f"Compacting {len(manifest['segments'])} search index segments")
+        self.rebuild(indexed_package_names.values(), manifest["version"])
+
+
+class SearchCache:
+    """
+    On-disk LRU of `search` results for one database version.
+
+    Results are stored under the normalized query, `limit` and `cutoff`. Entries of any
+    other database version are dropped, so a new `initdb` invalidates the whole cache.
+    The file is only rewritten when an entry is added or the LRU order changes, hit and
+    miss counters are kept per instance.
+    """
+
+    def __init__(self, filename: str, max_entries: int = MAX_CACHED_QUERIES):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, limit: int, cutoff: float) -> str:
+        return json.dumps([normalize_query(query), limit, cutoff])
+
+    def _read(self, version: str) -> Dict:
+        try:
+            with open(self.filename, "r") as file:
+                cache = json.load(file)
+        except (FileNotFoundError, ValueError):
+            cache = {}
+
+        if cache.get("version") != version:
+            cache = {"version": version, "entries": {}}
+        return cache
+
+    def _write(self, cache: Dict) -> None:
+        cache_dir = os.path.dirname(self.filename) or "."
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, cache_tmp = tempfile.mkstemp(prefix=".search-", dir=cache_dir)
+        with os.fdopen(fd, "w") as file:
+            json.dump(cache, file)
+        os.replace(cache_tmp, self.filename)
+
+    def get(self, query: str, limit: int, cutoff: float, version: str) -> Optional[List[str]]:
+        cache = self._read(version)
+        key = self.key(query, limit, cutoff)
+        entries = cache["entries"]
+
+        if key in entries:
+            self.hits += 1
+            if list(entries)[-1] != key:
+                # dicts keep insertion order, re-inserting marks entry as most recently used
+                entries[key] = entries.pop(key)
+                self._write(cache)
+        else:
+            self.misses += 1
+
+        logging.debug(f"Search cache: {self.hits} hits, {self.misses} misses")
+        return entries.get(key)
+
+    def put(self, query: str, limit: int, cutoff: float, version: str, result: List[str]) -> None:
+        cache = self._read(version)
+        entries = cache["entries"]
+        entries[self.key(query, limit, cutoff)] = result
+
+        for key in list(entries)[: max(0, len(entries) - self.max_entries)]:
+            del entries[key]
+
+        self._write(cache)
+
+
+def normalize_query(query: str) -> str:
+    if not isinstance(query, str):
+        raise TypeError(f"Search query must be str, not {type(query).__name__}")
+    return " ".join(query.lower().split())
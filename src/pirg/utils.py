@@ -1,32 +1,63 @@
+import gzip
+import json
 import logging
 import os
 import re
-import subprocess
 import sys
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from difflib import get_close_matches
-from typing import Dict, List, Optional, Set, Tuple
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 import requests
-from bs4 import BeautifulSoup
+import urllib3
 from fuzzywuzzy import fuzz, process
 from packaging.specifiers import Specifier, SpecifierSet
 from packaging.version import Version
-
-from .exceptions import DisabledPipFlag, WrongPkgName, WrongSpecifierSet, EmptyDatabase
+from requests.adapters import HTTPAdapter
+from rich.progress import (
+    BarColumn,
+    DownloadColumn,
+    Progress,
+    TextColumn,
+    TimeRemainingColumn,
+    TransferSpeedColumn,
+)
+
+from .exceptions import (
+    DisabledPipFlag,
+    EmptyDatabase,
+    NoCompatibleVersion,
+    WrongPkgName,
+    WrongSpecifierSet,
+)
+from .indexes import DEFAULT_INDEX_URL, INDEX_TIMEOUT, IndexPool, json_url
+from .installers import Installer, get_installer
 from .models import Package
 
-PYPI_URL = lambda pkg_name: f"https://pypi.org/pypi/{pkg_name}/json"
-PYPI_SIMPLE_URL = "https://pypi.org/simple/"
+PYPI_URL = lambda pkg_name: json_url(DEFAULT_INDEX_URL, pkg_name)
+PYPI_SIMPLE_URL = DEFAULT_INDEX_URL
 PY_VERSION = Version(sys.version.split()[0])
-PARSE_PATTERN = r"^(?P<name>[a-zA-Z0-9_-]+)(\[(?P<suffix>[a-zA-Z0-9_-]+)\])?(?P<specifier_set>.*)"
+PARSE_PATTERN = re.compile(
+    r"^(?P<name>[a-zA-Z0-9_-]+)(\[(?P<suffix>[a-zA-Z0-9_-]+)\])?(?P<specifier_set>.*)"
+)
 REQUIREMENTS = "requirements.txt"
+CANONICAL_PATTERN = re.compile(r"[-_.]+")
+# parsed requirements, names and specifier sets are shared by everyone asking for the same string
+PARSE_CACHE_SIZE = 16384
+SEARCH_LIMIT = 7
+SEARCH_CUTOFF = 0.6
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_TIMEOUT = 30
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse_package_name(pkg: str) -> Tuple[str, Optional[str], Optional[str]]:
-    pattern = PARSE_PATTERN
-
-    match = re.match(pattern, pkg)
+    match = PARSE_PATTERN.match(pkg)
     if not match:
         raise WrongPkgName(f"Package {pkg} does not match pattern")
 
@@ -39,6 +70,29 @@ def parse_package_name(pkg: str) -> Tuple[str, Optional[str], Optional[str]]:
     return name, suffix, specifier_set
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def canonicalize_name(name: str) -> str:
+    # PEP 503 normalized form, the same one PyPI uses for `/simple/<name>/`
+    return CANONICAL_PATTERN.sub("-", name).lower()
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def get_specifier_set(specifier_set: str) -> SpecifierSet:
+    return SpecifierSet(specifier_set)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def make_package(requirement: str) -> Package:
+    # the Package is cached already, don't keep the parsed tuple around twice
+    name, suffix, specifier_set = parse_package_name.__wrapped__(requirement)
+    return Package(name=name, suffix=suffix, specifier_set=specifier_set)
+
+
+def parse_python_versions(value: str) -> List[Version]:
+    # "3.9, 3.10" -> [Version("3.9"), Version("3.10")]
+    return [Version(py.strip()) for py in value.split(",") if py.strip()]
+
+
 def create_requirements(
     package_names: Set[Package],
     requirements_loc: str,
@@ -57,38 +111,198 @@ def load_requirements_file(requirements_loc: str) -> Set[Package]:
 
     with open(requirements_loc, "r") as req_file:
         for line in req_file:
-            name, suffix, specifier_set = parse_package_name(line)
-            pkg = Package(
-                name=name,
-                suffix=suffix,
-                specifier_set=specifier_set,
-            )
-            requirements.add(pkg)
+            requirements.add(make_package(line.strip()))
 
     return requirements
 
 
-def get_package(package_name: str) -> Package:
-    pkg_name, pkg_suffix, pkg_specifier_set = parse_package_name(package_name)
+def fetch_package_data(
+    pkg_name: str,
+    session: Optional[requests.Session] = None,
+    cache_dir: Optional[str] = None,
+    pool: Optional[IndexPool] = None,
+) -> Dict:
+    """
+    Gets project metadata from the JSON API of the indexes in `pool`, PyPI by default.
+
+    With `cache_dir` the last response is kept on disk and revalidated with
+    `If-None-Match`/`If-Modified-Since`, so unchanged projects cost a 304 instead of
+    the full release list.
+    """
+    pool = pool or IndexPool()
+    headers = {}
+    cached = None
+    cache_file = None
+
+    if cache_dir:
+        cache_file = os.path.join(cache_dir, f"{canonicalize_name(pkg_name)}.json")
+        try:
+            with open(cache_file, "r") as file:
+                cached = json.load(file)
+        except (FileNotFoundError, ValueError):
+            cached = None
+
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = pool.get(lambda index_url: json_url(index_url, pkg_name), headers, session)
+    if cached and response.status_code == 304:
+        logging.debug(f"{pkg_name}: not modified")
+        return cached["data"]
 
-    response = requests.get(PYPI_URL(pkg_name=pkg_name))
-    response.raise_for_status()
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        # the URL belongs to whichever index answered, callers report the project
+        e.package_name = pkg_name
+        raise
     package_data = response.json()
 
-    valid_versions: Set[Version] = {
-        Version(rel)
-        for rel in package_data["releases"]
-        for elem in package_data["releases"][rel]
-        if elem["requires_python"] is not None
-        and PY_VERSION in SpecifierSet(elem["requires_python"])
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if cache_file and (etag or last_modified):
+        # only what version selection needs, full responses can be several MB
+        package_data = {
+            "releases": {
+                rel: [{"requires_python": elem["requires_python"]} for elem in files]
+                for rel, files in package_data["releases"].items()
+            }
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, cache_tmp = tempfile.mkstemp(prefix=".json-", dir=cache_dir)
+        with os.fdopen(fd, "w") as file:
+            json.dump({"etag": etag, "last_modified": last_modified, "data": package_data}, file)
+        os.replace(cache_tmp, cache_file)
+
+    return package_data
+
+
+def create_session(max_workers: int = 16) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_packages_data(
+    pkg_names: Iterable[str],
+    cache_dir: Optional[str] = None,
+    max_workers: int = 16,
+    pool: Optional[IndexPool] = None,
+    session: Optional[requests.Session] = None,
+) -> Dict[str, Union[Dict, Exception]]:
+    """
+    Concurrent `fetch_package_data`. Failures are returned in place of the data
+    so one missing project doesn't hide the results for the rest.
+    Without `session`, one is opened for this call only.
+    """
+    pkg_names = list(pkg_names)
+    results = {}
+    if not pkg_names:
+        return results
+
+    http = session or create_session(max_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pkg_names))) as executor:
+            futures = {
+                executor.submit(fetch_package_data, name, http, cache_dir, pool): name
+                for name in pkg_names
+            }
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    results[futures[future]] = e
+    finally:
+        if session is None:
+            http.close()
+
+    return results
+
+
+def get_compatible_versions(
+    package_data: Dict,
+    python_versions: List[Version],
+) -> Dict[Version, Set[Version]]:
+    """
+    Releases usable on each of `python_versions`, evaluated in a single pass over the metadata.
+    Every distinct `requires_python` string is parsed and checked only once.
+    """
+    compatible: Dict[Version, Set[Version]] = {py: set() for py in python_versions}
+    supported_by: Dict[str, List[Version]] = {}
+
+    for rel, files in package_data["releases"].items():
+        for elem in files:
+            requires_python = elem["requires_python"]
+            if requires_python is None:
+                continue
+
+            if requires_python not in supported_by:
+                specifier_set = get_specifier_set(requires_python)
+                supported_by[requires_python] = [
+                    py for py in python_versions if py in specifier_set
+                ]
+
+            for py in supported_by[requires_python]:
+                compatible[py].add(Version(rel))
+
+    if not supported_by:
+        # when `requires_python = None` for all pkgs
+        releases = {Version(rel) for rel in package_data["releases"]}
+        compatible = {py: set(releases) for py in python_versions}
+
+    for py, valid_versions in compatible.items():
+        logging.debug(f"valid_versions[{py}]: {valid_versions}")
+
+    return compatible
+
+
+def get_valid_versions(
+    package_data: Dict,
+    python_versions: Optional[List[Version]] = None,
+) -> Set[Version]:
+    # releases compatible with every target interpreter
+    compatible = get_compatible_versions(package_data, python_versions or [PY_VERSION])
+    return set.intersection(*compatible.values())
+
+
+def get_latest_version(valid_versions: Set[Version]) -> Version:
+    # do not allow pre, post or dev releases
+    valid_versions = {
+        v for v in valid_versions if not (v.is_prerelease or v.is_postrelease or v.is_devrelease)
     }
+    return max(valid_versions)
+
+
+def pick_version(
+    valid_versions: Set[Version],
+    pkg_specifier_set: Optional[SpecifierSet] = None,
+) -> Optional[Version]:
+    if pkg_specifier_set:
+        return max(pkg_specifier_set.filter(valid_versions), default=None)
+
+    try:
+        return get_latest_version(valid_versions)
+    except ValueError:
+        return None
+
 
-    logging.debug(f"valid_versions: {valid_versions}")
+def select_specifier_set(
+    package_data: Dict,
+    pkg_specifier_set: Optional[str],
+    python_versions: Optional[List[Version]] = None,
+) -> SpecifierSet:
+    python_versions = python_versions or [PY_VERSION]
+    valid_versions = get_valid_versions(package_data, python_versions)
     if not valid_versions:
-        # when `requires_python = None` for all pkgs
-        valid_versions = {Version(rel) for rel in package_data["releases"]}
+        # fmt: off
+        raise NoCompatibleVersion(f"No release supports all of python {', '.join(map(str, python_versions))}")
+        # fmt: on
 
-    pkg_specifier_set = SpecifierSet(pkg_specifier_set) if pkg_specifier_set else None
+    pkg_specifier_set = get_specifier_set(pkg_specifier_set) if pkg_specifier_set else None
     logging.debug(f"pkg_specifier_set: {pkg_specifier_set}")
 
     if pkg_specifier_set:
@@ -102,19 +316,129 @@ def get_package(package_name: str) -> Package:
 
         specifier_set = specifier_set.pop()
     else:
-        # do not allow pre, post or dev releases
-        valid_versions = {
-            v
-            for v in valid_versions
-            if not (v.is_prerelease or v.is_postrelease or v.is_devrelease)
-        }
-        max_version = max(valid_versions)
+        max_version = get_latest_version(valid_versions)
         specifier_set = SpecifierSet(f"=={max_version}")
 
     logging.debug(f"specifier_set: {specifier_set}")
+    return specifier_set
+
+
+def get_package(
+    package_name: str,
+    python_versions: Optional[List[Version]] = None,
+    pool: Optional[IndexPool] = None,
+) -> Package:
+    pkg_name, pkg_suffix, pkg_specifier_set = parse_package_name(package_name)
+
+    package_data = fetch_package_data(pkg_name, pool=pool)
+    specifier_set = select_specifier_set(package_data, pkg_specifier_set, python_versions)
+
     return Package(name=pkg_name, suffix=pkg_suffix, specifier_set=specifier_set)
 
 
+def get_pinned_version(pkg: Package) -> Optional[Version]:
+    specifiers = list(get_specifier_set(str(pkg.specifier_set or "")))
+    if len(specifiers) != 1 or specifiers[0].operator not in ("==", "==="):
+        return None
+    if "*" in specifiers[0].version:
+        return None
+    return Version(specifiers[0].version)
+
+
+def check_outdated(
+    packages: Iterable[Package],
+    cache_dir: Optional[str] = None,
+    python_versions: Optional[List[Version]] = None,
+    pool: Optional[IndexPool] = None,
+    fetched: Optional[Dict[str, Union[Dict, Exception]]] = None,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Compares every pinned package with the latest release `get_package` would pick.
+    Packages that couldn't be checked have the reason in `error`.
+    Metadata already fetched can be passed as `fetched`, keyed by package name.
+    """
+    pinned = {}
+    for pkg in packages:
+        version = get_pinned_version(pkg)
+        if version is None:
+            logging.debug(f"Skipping {pkg}, not pinned")
+            continue
+        pinned[pkg.name] = version
+
+    results = fetched
+    if results is None:
+        results = fetch_packages_data(pinned, cache_dir=cache_dir, pool=pool)
+
+    report = []
+    for name in sorted(pinned, key=str.lower):
+        package_data = results[name]
+        latest = None
+        error = None
+        if isinstance(package_data, Exception):
+            error = str(package_data)
+        else:
+            latest = pick_version(get_valid_versions(package_data, python_versions))
+            if latest is None:
+                error = "no compatible stable release found"
+
+        if error:
+            logging.error(f"Failed to check {name}: {error}")
+
+        report.append(
+            {
+                "name": name,
+                "current": str(pinned[name]),
+                "latest": str(latest) if latest else None,
+                "outdated": bool(latest and latest > pinned[name]),
+                "error": error,
+            }
+        )
+
+    return report
+
+
+def resolve_matrix(
+    package_names: Iterable[str],
+    python_versions: List[Version],
+    cache_dir: Optional[str] = None,
+    pool: Optional[IndexPool] = None,
+    fetched: Optional[Dict[str, Union[Dict, Exception]]] = None,
+) -> List[Dict]:
+    """
+    Pins every package for each of `python_versions` and for all of them at once.
+    Metadata of each project is fetched only once, whatever the number of targets.
+    Metadata already fetched can be passed as `fetched`, keyed by package name.
+    """
+    parsed = [parse_package_name(package_name) for package_name in package_names]
+    results = fetched
+    if results is None:
+        names = {name for name, _, _ in parsed}
+        results = fetch_packages_data(names, cache_dir=cache_dir, pool=pool)
+
+    matrix = []
+    for name, suffix, pkg_specifier_set in parsed:
+        package_data = results[name]
+        if isinstance(package_data, Exception):
+            logging.error(f"Failed to resolve {name}: {package_data}")
+            package_data = {"releases": {}}
+
+        pkg_specifier_set = get_specifier_set(pkg_specifier_set) if pkg_specifier_set else None
+        compatible = get_compatible_versions(package_data, python_versions)
+        pins = {str(py): pick_version(compatible[py], pkg_specifier_set) for py in python_versions}
+        common = set.intersection(*compatible.values()) if compatible else set()
+        all_pin = pick_version(common, pkg_specifier_set)
+
+        matrix.append(
+            {
+                "name": str(Package(name=name, suffix=suffix)),
+                "pins": {py: str(pin) if pin else None for py, pin in pins.items()},
+                "all": str(all_pin) if all_pin else None,
+            }
+        )
+
+    return matrix
+
+
 def check_for_pip_args() -> Set[str]:
     try:
         dash_idx = sys.argv.index("--") + 1
@@ -145,20 +469,170 @@ def check_for_requirements_file() -> str:
     return os.path.join(os.getcwd(), REQUIREMENTS)
 
 
-def get_pypi_simple_data(url: str = PYPI_SIMPLE_URL) -> str:
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.text
+def _read_download_meta(meta_file: str) -> Dict:
+    try:
+        with open(meta_file, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
 
 
-def check_if_pypi_simple_is_modified(days: int = 3, url: str = PYPI_SIMPLE_URL) -> bool:
-    current_date = datetime.now()
-    last_modified_date = current_date - timedelta(days=days)
-    if_modified_since = last_modified_date.strftime("%a, %d %b %Y %H:%M:%S GMT")
+def _download_chunks(
+    response: requests.Response,
+    file: BinaryIO,
+    offset: int,
+    show_progress: bool,
+) -> None:
+    total = response.headers.get("Content-Length")
+    total = offset + int(total) if total else None
+    # raw stream, the body is stored as sent (compressed) so byte ranges stay valid
+    chunks = response.raw.stream(DOWNLOAD_CHUNK_SIZE, decode_content=False)
+
+    if not show_progress:
+        for chunk in chunks:
+            file.write(chunk)
+        return
+
+    columns = (
+        TextColumn("[pirg]"),
+        BarColumn(),
+        DownloadColumn(),
+        TransferSpeedColumn(),
+        TimeRemainingColumn(),
+    )
+    with Progress(*columns, transient=True) as progress:
+        task = progress.add_task("download", total=total, completed=offset)
+        for chunk in chunks:
+            file.write(chunk)
+            progress.advance(task, len(chunk))
+
+
+def _remove_download(partial_file: str, meta_file: str) -> None:
+    for filename in (partial_file, meta_file):
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
+def _decode_download(data: bytes, encoding: Optional[str]) -> str:
+    encoding = (encoding or "identity").lower()
+    if encoding == "gzip":
+        data = gzip.decompress(data)
+    elif encoding == "deflate":
+        try:
+            data = zlib.decompress(data)
+        except zlib.error:
+            # some servers send raw deflate without zlib header
+            data = zlib.decompress(data, -zlib.MAX_WBITS)
+    elif encoding != "identity":
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+    return data.decode("utf-8")
+
+
+def get_pypi_simple_data(
+    url: str = PYPI_SIMPLE_URL,
+    partial_file: Optional[str] = None,
+    retries: int = DOWNLOAD_RETRIES,
+    show_progress: bool = False,
+    session: Optional[requests.Session] = None,
+) -> Tuple[str, Optional[str]]:
+    """
+    Downloads the simple index compressed and resumable.
+
+    The body goes to `partial_file` as it arrives, with the validators and encoding in
+    `<partial_file>.json`. After an interruption, in this run or a previous one, the download
+    continues with a `Range` request guarded by `If-Range`, so a changed index starts over.
+    A partial answer that doesn't continue the file drops it and starts over as well.
+    Returns the page and its ETag, raises `ContentDecodingError` for a corrupt download.
+    """
+    http = session or requests
+    partial_file = partial_file or os.path.join(tempfile.gettempdir(), "pirg_simple.partial")
+    meta_file = partial_file + ".json"
+    os.makedirs(os.path.dirname(partial_file) or ".", exist_ok=True)
+
+    attempt = 0
+    while True:
+        headers = {"Accept-Encoding": "gzip, deflate"}
+        meta = _read_download_meta(meta_file)
+        offset = os.path.getsize(partial_file) if os.path.exists(partial_file) else 0
+        validator = meta.get("etag") or meta.get("last_modified")
+
+        if meta.get("url") == url and validator and offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+            logging.info(f"Resuming download from {offset} bytes")
+        else:
+            offset = 0
+
+        try:
+            with http.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                if response.status_code == 416:
+                    # stale partial file, nothing to resume
+                    os.remove(partial_file)
+                    continue
+                response.raise_for_status()
+
+                encoding = response.headers.get("Content-Encoding")
+                content_range = response.headers.get("Content-Range", "")
+                resumed = (
+                    response.status_code == 206
+                    and content_range.startswith(f"bytes {offset}-")
+                    and encoding == meta.get("encoding")
+                )
+                if response.status_code == 206 and not resumed:
+                    if "Range" not in headers:
+                        raise requests.HTTPError(
+                            f"Unexpected partial response from {url}", response=response
+                        )
+                    logging.info("Partial response doesn't match the download, starting over")
+                    _remove_download(partial_file, meta_file)
+                    continue
+                if not resumed:
+                    offset = 0
+                    meta = {
+                        "url": url,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "encoding": encoding,
+                    }
+                    with open(meta_file, "w") as file:
+                        json.dump(meta, file)
+
+                with open(partial_file, "ab" if resumed else "wb") as file:
+                    _download_chunks(response, file, offset, show_progress)
+            break
+        except (requests.ConnectionError, requests.Timeout, urllib3.exceptions.HTTPError) as e:
+            attempt += 1
+            if attempt > retries:
+                raise requests.ConnectionError(f"Download of {url} interrupted: {e}") from e
+            logging.warning(f"Download interrupted ({e}), retrying")
 
-    headers = {"If-Modified-Since": if_modified_since}
+    try:
+        with open(partial_file, "rb") as file:
+            data = _decode_download(file.read(), meta.get("encoding"))
+    except (OSError, EOFError, zlib.error, ValueError) as e:
+        raise requests.exceptions.ContentDecodingError(f"Download of {url} is corrupt: {e}") from e
+    finally:
+        _remove_download(partial_file, meta_file)
+
+    return data, meta.get("etag")
+
+
+def check_if_pypi_simple_is_modified(
+    days: int = 3,
+    url: str = PYPI_SIMPLE_URL,
+    etag: Optional[str] = None,
+    timeout: float = INDEX_TIMEOUT,
+) -> bool:
+    if etag:
+        headers = {"If-None-Match": etag}
+    else:
+        current_date = datetime.now()
+        last_modified_date = current_date - timedelta(days=days)
+        if_modified_since = last_modified_date.strftime("%a, %d %b %Y %H:%M:%S GMT")
+        headers = {"If-Modified-Since": if_modified_since}
 
-    response = requests.head(url, headers=headers)
+    # a stalled index has to fail, or initdb never moves on to the next one
+    response = requests.head(url, headers=headers, timeout=timeout)
     response.raise_for_status()
 
     if response.status_code == 200:
@@ -167,27 +641,29 @@ def check_if_pypi_simple_is_modified(days: int = 3, url: str = PYPI_SIMPLE_URL)
         return False
 
 
-def create_db(filename: str, data: str) -> None:
-    soup = BeautifulSoup(data, "html.parser")
-    links = soup.find_all("a")
-    package_names = [link.text.strip() for link in links if link.text.strip()]
-
-    with open(filename, "w") as file:
-        for package in package_names:
-            file.write(package + "\n")
-
-
-def fuzzy_search(search_input: str, indexed_pkg_names: Dict[str, str]) -> List[str]:
+def fuzzy_search(
+    search_input: str,
+    indexed_pkg_names: Dict[str, str],
+    limit: int = SEARCH_LIMIT,
+    cutoff: float = SEARCH_CUTOFF,
+) -> List[str]:
     if not indexed_pkg_names:
         raise EmptyDatabase("Empty DB")
 
-    matches = get_close_matches(search_input, indexed_pkg_names, n=7, cutoff=0.6)
-    search_results = process.extract(search_input, matches, scorer=fuzz.ratio)
+    matches = get_close_matches(search_input, indexed_pkg_names, n=limit, cutoff=cutoff)
+    search_results = process.extract(search_input, matches, scorer=fuzz.ratio, limit=limit)
 
     org_names = [indexed_pkg_names[result] for result, _ in search_results]
     return org_names
 
 
-def run_subprocess(pkgs: List[str], pip_command: str, pip_args: List[str]):
-    subprocess.run(["pip", pip_command] + pkgs + pip_args, check=True)
+def run_subprocess(
+    pkgs: List[str],
+    pip_command: str,
+    pip_args: List[str],
+    installer: Optional[Installer] = None,
+):
+    installer = installer or get_installer()
+    elapsed = installer.run(pip_command, pkgs, pip_args)
     logging.info(f"{pip_command.capitalize()}ed packages: {pkgs}")
+    logging.info(f"{installer.name} {pip_command} took {elapsed:.2f}s")
@@ -0,0 +1,22 @@
+import pytest
+
+
+class SitePackages:
+    """
+    Fake site-packages directory, distributions are `.dist-info` directories with METADATA only.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def add(self, name, version, requires=(), extras=()):
+        lines = [f"Name: {name}", f"Version: {version}"]
+        lines += [f"Provides-Extra: {extra}" for extra in extras]
+        lines += [f"Requires-Dist: {req}" for req in requires]
+        dist_info = self.path.mkdir(f"{name}-{version}.dist-info")
+        dist_info.join("METADATA").write("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def site_packages(tmpdir):
+    return SitePackages(tmpdir.mkdir("site-packages"))
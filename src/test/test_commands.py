@@ -1,15 +1,57 @@
 import logging
 import os.path
+import subprocess
 import sys
 import requests
 import pytest
 from requests import HTTPError
-from pirg.pirg import initdb, install, uninstall, search
-from pirg.pirg import TEMP_FILENAME
+from pirg.indexes import IndexStats
+from pirg.installers import DryRunInstaller
+from pirg.inventory import Inventory
+import responses
+from pirg.pirg import (
+    INDEX_STATS_FILENAME,
+    indexes,
+    initdb,
+    install,
+    outdated,
+    uninstall,
+    search,
+    sync,
+)
+from pirg.database import create_db, current_snapshot, get_db_dir, load_package_names, read_header
 
 # TODO: test update all
 # FIXME: try to mock packages
-# FIXME: mock run_subprocess
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmpdir, monkeypatch):
+    # commands read the package database and write inventory and index statistics there
+    monkeypatch.setenv("PIRG_CACHE_DIR", tmpdir.strpath)
+    return tmpdir.strpath
+
+
+@pytest.fixture
+def environment(monkeypatch, site_packages):
+    """
+    Fake site-packages the commands scan instead of the real environment, installers only
+    record their calls. Returns a function adding a distribution and the installer.
+    """
+    path = site_packages.path.strpath
+    load = Inventory.load
+    installer = DryRunInstaller()
+    monkeypatch.setattr("pirg.pirg.Inventory.load", lambda cache_file: load(cache_file, [path]))
+    monkeypatch.setattr("pirg.pirg.get_installer", lambda name=None: installer)
+    dist = site_packages.add
+
+    # pirg, its dependencies and the packaging tools are never removed
+    for name in ["pip", "setuptools", "wheel", "click"]:
+        dist(name, "1.0")
+    dist("pirg", "1.0", ["typer", "requests"])
+    dist("typer", "1.0", ["click"])
+    dist("requests", "1.0")
+    return dist, installer
 
 
 def mock_get_package(package_name):
@@ -28,6 +70,7 @@ def test_install(tmpdir, monkeypatch, caplog):
 
     monkeypatch.setattr("pirg.utils.load_requirements_file", lambda x: set())
     monkeypatch.setattr("pirg.utils.run_subprocess", lambda pkgs, cmd, args: None)
+    monkeypatch.setenv("PIRG_INSTALLER", "dry-run")
 
     # check if requirements exist
     install(package_names=package_names, requirements_path=requirements_file.strpath)
@@ -60,6 +103,42 @@ def test_install(tmpdir, monkeypatch, caplog):
     assert "Nothing to install" in [rec.message for rec in caplog.records]
 
 
+def mock_simple_data(package_names):
+    return "".join(f'<a href="/simple/{name}/">{name}</a>' for name in package_names)
+
+
+def test_install_unknown_package(tmpdir, monkeypatch):
+    monkeypatch.setenv("PIRG_CACHE_DIR", tmpdir.strpath)
+    create_db(get_db_dir(), mock_simple_data(["numpy", "requests"]))
+
+    fetch = lambda *args, **kwargs: mock_get_package(None)
+    monkeypatch.setattr("pirg.resolver.fetch_packages_data", fetch)
+    monkeypatch.setattr(sys, "argv", [])
+
+    # rejected before any request to PyPI is made
+    requirements_file = tmpdir.join("requirements.txt")
+    with pytest.raises(SystemExit) as excinfo:
+        install(package_names=["nmupy"], requirements_path=requirements_file.strpath)
+    assert excinfo.value.code == 4005
+    assert not requirements_file.exists()
+
+
+def test_install_not_found(monkeypatch, caplog):
+    create_db(get_db_dir(), mock_simple_data(["numpy"]))
+    monkeypatch.setattr(sys, "argv", [])
+    caplog.set_level(logging.INFO)
+
+    # reported by project name whichever index answered
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://pypi.org/pypi/numpy/json", status=404)
+        with pytest.raises(SystemExit) as excinfo:
+            install(package_names=["numpy"])
+    assert excinfo.value.code == 404
+    assert "Failed to find the latest version of numpy on the package index" in [
+        rec.message for rec in caplog.records
+    ]
+
+
 def test_uninstall(tmpdir, monkeypatch, caplog):
     test_dir = tmpdir.mkdir("test_dir")
     package_names = ["python-dotenv", "numpy"]
@@ -68,6 +147,7 @@ def test_uninstall(tmpdir, monkeypatch, caplog):
 
     monkeypatch.setattr("pirg.utils.load_requirements_file", lambda x: set())
     monkeypatch.setattr("pirg.utils.run_subprocess", lambda pkgs, cmd, args: None)
+    monkeypatch.setenv("PIRG_INSTALLER", "dry-run")
 
     # create requirements file
     install(package_names=package_names, requirements_path=requirements_file.strpath)
@@ -105,26 +185,77 @@ def test_uninstall(tmpdir, monkeypatch, caplog):
     assert "Nothing to remove" in [rec.message for rec in caplog.records]
 
 
+def test_uninstall_orphans(tmpdir, monkeypatch, environment):
+    dist, installer = environment
+    dist("app", "1.0", ["lib-a", "lib-b"])
+    dist("other", "1.0", ["lib-a"])
+    dist("lib-a", "1.0")
+    dist("lib-b", "1.0", ["requests", "setuptools"])
+    requirements_file = tmpdir.join("requirements.txt")
+    requirements_file.write("app==1.0\nother==1.0\nghost==1.0\n")
+    monkeypatch.setattr(sys, "argv", ["--", "-y"])
+
+    # lib-a is still needed by other, requests and setuptools by pirg
+    uninstall(package_names=["app"], requirements_path=requirements_file.strpath, orphans=True)
+    assert installer.calls == [("uninstall", ["app", "lib-b"], ["-y"])]
+    assert sorted(requirements_file.read().split()) == ["ghost==1.0", "other==1.0"]
+
+    # not installed in the scanned environment, only removed from the requirements file
+    uninstall(package_names=["ghost"], requirements_path=requirements_file.strpath)
+    assert len(installer.calls) == 1
+    assert requirements_file.read().split() == ["other==1.0"]
+
+    # names match as PEP 503 normalized
+    uninstall(package_names=["OTHER"], requirements_path=requirements_file.strpath)
+    assert installer.calls[-1] == ("uninstall", ["other"], ["-y"])
+    assert requirements_file.read().split() == []
+
+
+def test_sync_prune(tmpdir, monkeypatch, environment):
+    dist, installer = environment
+    dist("app", "1.0", ["lib-a"])
+    dist("lib-a", "1.0")
+    dist("lib-x", "1.0")
+    dist("stray", "1.0", ["stray-dep", "requests"])
+    dist("stray-dep", "1.0")
+    requirements_file = tmpdir.join("requirements.txt")
+    requirements_file.write("app==1.0\nlib-x>=2.0\nmissing==1.0\n")
+    monkeypatch.setattr(sys, "argv", [])
+
+    sync(requirements_path=requirements_file.strpath)
+    assert installer.calls == [("install", ["lib-x>=2.0", "missing==1.0"], [])]
+
+    installer.calls.clear()
+    sync(requirements_path=requirements_file.strpath, prune=True)
+    assert installer.calls == [
+        ("install", ["lib-x>=2.0", "missing==1.0"], []),
+        ("uninstall", ["stray", "stray-dep"], ["-y"]),
+    ]
+
+    requirements_file.write("app==1.0\nstray\n")
+    installer.calls.clear()
+    sync(requirements_path=requirements_file.strpath, prune=True)
+    assert installer.calls == [("uninstall", ["lib-x"], ["-y"])]
+
+
 def test_initdb(monkeypatch, tmpdir, caplog):
-    def mock_data():
-        return "package1\npackage2\npackage3"
+    def mock_data(**kwargs):
+        return mock_simple_data(["package1", "package2", "package3"]), '"etag1"'
 
     caplog.set_level(logging.INFO)
 
-    monkeypatch.setattr("tempfile.gettempdir", lambda: tmpdir.strpath)
-    monkeypatch.setattr(
-        "pirg.utils.check_if_pypi_simple_is_modified.__code__",
-        (lambda: False).__code__,
-    )
-    monkeypatch.setattr(
-        "pirg.utils.get_pypi_simple_data.__code__",
-        mock_data.__code__,
-    )
+    monkeypatch.setenv("PIRG_CACHE_DIR", tmpdir.strpath)
+    monkeypatch.setattr("pirg.pirg.check_if_pypi_simple_is_modified", lambda **kwargs: False)
+    monkeypatch.setattr("pirg.pirg.get_pypi_simple_data", mock_data)
 
     # default
     initdb()
     assert "Database initialized" in [rec.message for rec in caplog.records]
 
+    snapshot = current_snapshot(get_db_dir())
+    assert load_package_names(snapshot) == ["package1", "package2", "package3"]
+    assert read_header(snapshot)["etag"] == '"etag1"'
+
     # already initialized
     initdb()
     assert "Database already initialized" in [rec.message for rec in caplog.records]
@@ -133,21 +264,80 @@ def test_initdb(monkeypatch, tmpdir, caplog):
     initdb(update=True)
     assert "Database is up-to-date" in [rec.message for rec in caplog.records]
 
+    # new snapshot is swapped in, the old one stays readable
+    monkeypatch.setattr("pirg.pirg.check_if_pypi_simple_is_modified", lambda **kwargs: True)
+    initdb(update=True)
+    assert current_snapshot(get_db_dir()) != snapshot
+    assert load_package_names(snapshot) == ["package1", "package2", "package3"]
+
+
+def test_initdb_failover(monkeypatch, tmpdir, caplog):
+    primary, mirror = "https://primary.example/simple/", "https://mirror.example/simple/"
+
+    def mock_data(url, **kwargs):
+        if url == primary:
+            raise requests.ConnectionError("Download of primary interrupted")
+        return mock_simple_data(["package1"]), '"etag1"'
+
+    caplog.set_level(logging.INFO)
+    monkeypatch.setenv("PIRG_CACHE_DIR", tmpdir.strpath)
+    monkeypatch.setattr("pirg.pirg.get_pypi_simple_data", mock_data)
+
+    initdb(index=[primary, mirror])
+    assert read_header(current_snapshot(get_db_dir()))["index"] == mirror
+
+    # failures are in the index statistics
+    stats = IndexStats(os.path.join(tmpdir.strpath, INDEX_STATS_FILENAME)).load()
+    assert stats[primary]["failures"] == 1
+    indexes()
+    assert "No index statistics yet" not in [rec.message for rec in caplog.records]
+
+    # all indexes fail
+    monkeypatch.setattr("pirg.pirg.check_if_pypi_simple_is_modified", lambda **kwargs: True)
+    monkeypatch.setenv("PIRG_INDEX_URLS", primary)
+    with pytest.raises(SystemExit) as excinfo:
+        initdb(update=True)
+    assert excinfo.value.code == 1
+
+    with pytest.raises(SystemExit) as excinfo:
+        initdb(update=True, index_policy="random")
+    assert excinfo.value.code == 4008
+
+    monkeypatch.setenv("PIRG_HEDGE_DELAY", "soon")
+    with pytest.raises(SystemExit) as excinfo:
+        initdb(update=True)
+    assert excinfo.value.code == 4009
+
+
+def test_outdated_check(tmpdir, caplog):
+    requirements_file = tmpdir.join("requirements.txt")
+    requirements_file.write("package1==1.0.0\n")
+    releases = {"releases": {"1.0.0": [{"requires_python": None}]}}
+    url = "https://pypi.org/pypi/package1/json"
+
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, url, json=releases)
+        outdated(requirements_path=requirements_file.strpath, check=True)
+
+    # a project that can't be checked fails the check
+    caplog.clear()
+    caplog.set_level(logging.INFO)
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, url, status=404)
+        with pytest.raises(SystemExit) as excinfo:
+            outdated(requirements_path=requirements_file.strpath, check=True)
+    assert excinfo.value.code == 1
+    assert "All packages are up-to-date" not in [rec.message for rec in caplog.records]
+
 
 def test_search(tmpdir, monkeypatch, caplog):
     package_names = ["package1", "paCKage2", "Package3"]
-    filename = os.path.join(tmpdir.strpath, TEMP_FILENAME)
-    with open(filename, "w") as file:
-        for package in package_names:
-            file.write(package + "\n")
+    monkeypatch.setenv("PIRG_CACHE_DIR", tmpdir.strpath)
+    create_db(get_db_dir(), mock_simple_data(package_names))
 
     caplog.set_level(logging.INFO)
 
-    monkeypatch.setattr("tempfile.gettempdir", lambda: tmpdir.strpath)
-    monkeypatch.setattr(
-        "pirg.utils.check_if_pypi_simple_is_modified.__code__",
-        (lambda: False).__code__,
-    )
+    monkeypatch.setattr("pirg.pirg.check_if_pypi_simple_is_modified", lambda **kwargs: False)
 
     user_input = "package3"
     search(user_input)
@@ -162,10 +352,7 @@ def test_search(tmpdir, monkeypatch, caplog):
     with pytest.raises(TypeError):
         search()
 
-    monkeypatch.setattr(
-        "pirg.utils.check_if_pypi_simple_is_modified.__code__",
-        (lambda: True).__code__,
-    )
+    monkeypatch.setattr("pirg.pirg.check_if_pypi_simple_is_modified", lambda **kwargs: True)
     user_input = ""
     search(user_input)
     assert (
@@ -173,11 +360,47 @@ def test_search(tmpdir, monkeypatch, caplog):
         in [rec.message for rec in caplog.records]
     )
 
-    filename = os.path.join(tmpdir.strpath, TEMP_FILENAME)
-    with open(filename, "w") as file:
-        file.write("")
+    create_db(get_db_dir(), "")
 
     user_input = ""
     with pytest.raises(SystemExit) as excinfo:
         search(user_input)
     assert excinfo.value.code == 4004
+
+
+def test_search_cache(tmpdir, monkeypatch, caplog):
+    monkeypatch.setenv("PIRG_CACHE_DIR", tmpdir.strpath)
+    monkeypatch.setattr("pirg.pirg.check_if_pypi_simple_is_modified", lambda **kwargs: False)
+    create_db(get_db_dir(), mock_simple_data(["package1", "Package3"]))
+    caplog.set_level(logging.DEBUG)
+
+    search("package3", log_level="DEBUG")
+    assert "Search cache: 0 hits, 1 misses" in [rec.message for rec in caplog.records]
+
+    # repeated (normalized) query touches neither the database nor the cache file
+    def fail(*args, **kwargs):
+        raise AssertionError("database loaded or cache rewritten")
+
+    monkeypatch.setattr("pirg.resolver.load_search_index", fail)
+    monkeypatch.setattr("pirg.search_index.SearchCache._write", fail)
+    search(" PACKAGE3 ", log_level="DEBUG")
+    assert "Search cache: 1 hits, 0 misses" in [rec.message for rec in caplog.records]
+    assert "Search result: ['Package3', 'package1']" in [rec.message for rec in caplog.records]
+
+    # new database drops cached results
+    monkeypatch.undo()
+    monkeypatch.setenv("PIRG_CACHE_DIR", tmpdir.strpath)
+    monkeypatch.setattr("pirg.pirg.check_if_pypi_simple_is_modified", lambda **kwargs: False)
+    create_db(get_db_dir(), mock_simple_data(["package1", "package3-new"]))
+    search("package3")
+    assert "package3-new" in caplog.records[-1].message
+
+
+def test_import_keeps_loggers():
+    # library import configures nothing and doesn't load the CLI
+    code = (
+        "import logging, sys; logger = logging.getLogger('app'); import pirg; "
+        "assert 'pirg.pirg' not in sys.modules; import pirg.pirg; "
+        "assert not logger.disabled; assert pirg.Resolver and pirg.InstallPlan and pirg.Package"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
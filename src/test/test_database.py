@@ -0,0 +1,33 @@
+import os
+import struct
+
+import pytest
+from pirg.database import check_package_names, create_db, load_name_filter
+from pirg.exceptions import UnknownPackage
+from pirg.utils import canonicalize_name
+
+
+def test_check_package_names(tmpdir):
+    package_names = ["python-dotenv", "numpy", "Zope.Interface"]
+    data = "".join(f"<a>{name}</a>" for name in package_names)
+
+    # no snapshot means no initdb, nothing to check against
+    check_package_names(["nmupy"], snapshot=None)
+
+    snapshot = create_db(os.path.join(tmpdir, "db"), data)
+    check_package_names(["numpy==1.0", "python_dotenv[cli]", "zope-interface"], snapshot)
+
+    with pytest.raises(UnknownPackage) as excinfo:
+        check_package_names(["numpy", "nmupy"], snapshot=snapshot)
+    assert "nmupy (did you mean: numpy?)" in str(excinfo.value)
+    assert canonicalize_name("Zope.Interface") == "zope-interface"
+
+    # filter of the old layout is ignored instead of misparsed, and not reused by the next build
+    old_filter = struct.pack(">4sBQ", b"PIRG", 7, 64) + bytes(8)
+    with open(os.path.join(snapshot, "names.bloom"), "wb") as file:
+        file.write(old_filter)
+    assert load_name_filter(snapshot) is None
+    check_package_names(["nmupy"], snapshot=snapshot)
+
+    snapshot = create_db(os.path.join(tmpdir, "db"), data)
+    assert "numpy" in load_name_filter(snapshot)
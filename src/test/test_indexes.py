@@ -0,0 +1,116 @@
+import json
+import os
+import time
+
+import pytest
+import requests
+import responses
+from pirg.exceptions import WrongHedgeDelay, WrongIndexPolicy
+from pirg.indexes import IndexPool, IndexStats, get_index_pool, json_url
+from pirg.utils import fetch_package_data
+
+
+def test_index_pool(tmpdir, monkeypatch):
+    primary, mirror = "https://primary.example/simple/", "https://mirror.example/simple/"
+    primary_url, mirror_url = json_url(primary, "package1"), json_url(mirror, "package1")
+    assert primary_url == "https://primary.example/pypi/package1/json"
+    releases = {"releases": {"1.0.0": [{"requires_python": None}]}}
+    stats = IndexStats(os.path.join(tmpdir, "index_stats.json"))
+
+    closed = []
+    close = requests.Response.close
+
+    def record_close(response):
+        closed.append(response.status_code)
+        close(response)
+
+    monkeypatch.setattr(requests.Response, "close", record_close)
+
+    # failover moves on after 5xx, connection errors and bodies cut short
+    with IndexPool([primary, mirror], stats=stats) as pool:
+        cut = requests.exceptions.ChunkedEncodingError("Connection broken")
+        for error in (503, requests.ConnectionError("refused"), cut):
+            with responses.RequestsMock() as rsps:
+                if isinstance(error, int):
+                    rsps.add(responses.GET, primary_url, status=error)
+                else:
+                    rsps.add(responses.GET, primary_url, body=error)
+                rsps.add(responses.GET, mirror_url, json=releases)
+                assert fetch_package_data("package1", pool=pool) == releases
+        # the replaced 5xx response is released
+        assert closed == [503]
+
+        # 404 is an answer, mirror is not asked
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, primary_url, status=404)
+            with pytest.raises(requests.HTTPError):
+                fetch_package_data("package1", pool=pool)
+
+    saved = stats.load()
+    assert saved[primary]["requests"] == 4
+    assert saved[primary]["failures"] == 3
+    assert saved[mirror]["requests"] == 3
+    assert saved[mirror]["failures"] == 0
+
+    # hedged request goes to the mirror when the primary is slow, first answer wins
+    def slow(request):
+        time.sleep(1)
+        return 200, {}, '{"releases": {}}'
+
+    pool = IndexPool([primary, mirror], policy="hedge", hedge_delay=0.05)
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add_callback(responses.GET, primary_url, callback=slow)
+        rsps.add(responses.GET, mirror_url, json=releases)
+        start = time.perf_counter()
+        assert fetch_package_data("package1", pool=pool) == releases
+        assert time.perf_counter() - start < 0.9
+
+    # a failing primary is hedged right away, its response is released
+    pool.hedge_delay = 10
+    closed.clear()
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, primary_url, status=500)
+        rsps.add(responses.GET, mirror_url, json=releases)
+        assert fetch_package_data("package1", pool=pool) == releases
+    assert closed == [500]
+
+    # a 404 of the mirror waits for the slow primary, which may host private projects
+    def slow_private(request):
+        time.sleep(0.3)
+        return 200, {}, json.dumps(releases)
+
+    pool.hedge_delay = 0.05
+    with responses.RequestsMock() as rsps:
+        rsps.add_callback(responses.GET, primary_url, callback=slow_private)
+        rsps.add(responses.GET, mirror_url, status=404)
+        assert fetch_package_data("package1", pool=pool) == releases
+
+    # once the primary failed, the 404 of the mirror is the answer
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, primary_url, body=requests.ConnectionError("refused"))
+        rsps.add(responses.GET, mirror_url, status=404)
+        with pytest.raises(requests.HTTPError):
+            fetch_package_data("package1", pool=pool)
+
+    # downloads record their latency, not only their failures
+    def download(index_url):
+        if index_url == primary:
+            raise requests.ConnectionError("refused")
+        return index_url
+
+    stats = IndexStats(os.path.join(tmpdir, "download_stats.json"))
+    with IndexPool([primary, mirror], stats=stats) as pool:
+        assert pool.failover(download) == mirror
+    saved = stats.load()
+    assert saved[primary]["failures"] == 1
+    assert saved[mirror]["requests"] == 1
+    assert saved[mirror]["failures"] == 0
+
+    with pytest.raises(WrongIndexPolicy):
+        IndexPool([primary], policy="random")
+    with pytest.raises(WrongHedgeDelay):
+        IndexPool([primary], hedge_delay=-1)
+    for hedge_delay in ("soon", "nan"):
+        monkeypatch.setenv("PIRG_HEDGE_DELAY", hedge_delay)
+        with pytest.raises(WrongHedgeDelay):
+            get_index_pool([primary])
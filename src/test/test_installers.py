@@ -0,0 +1,45 @@
+import sys
+
+import pytest
+from pirg.exceptions import InstallerNotAvailable
+from pirg.installers import DryRunInstaller, Installer, PipInstaller, UvInstaller, get_installer
+from pirg.utils import run_subprocess
+
+
+def test_get_installer(monkeypatch):
+    monkeypatch.delenv("PIRG_INSTALLER", raising=False)
+    assert isinstance(get_installer(), PipInstaller)
+    assert get_installer().command("install", ["numpy==1.0"], [])[:3] == [
+        sys.executable,
+        "-m",
+        "pip",
+    ]
+
+    monkeypatch.setenv("PIRG_INSTALLER", "dry-run")
+    installer = get_installer()
+    assert isinstance(installer, DryRunInstaller)
+    run_subprocess(["numpy==1.0"], "uninstall", ["-y"], installer=installer)
+    assert installer.calls == [("uninstall", ["numpy==1.0"], ["-y"])]
+
+    # explicit name wins over env var
+    monkeypatch.setattr("shutil.which", lambda cmd: None)
+    assert isinstance(get_installer("auto"), PipInstaller)
+    with pytest.raises(InstallerNotAvailable):
+        _ = get_installer("uv")
+    with pytest.raises(InstallerNotAvailable):
+        _ = get_installer("conda")
+
+    monkeypatch.setattr("shutil.which", lambda cmd: f"/usr/bin/{cmd}")
+    assert isinstance(get_installer("auto"), UvInstaller)
+    assert UvInstaller().command("uninstall", ["numpy"], ["-y"]) == [
+        "uv",
+        "pip",
+        "uninstall",
+        "--python",
+        sys.executable,
+        "numpy",
+    ]
+
+    # backends must build their command
+    with pytest.raises(TypeError):
+        _ = Installer()
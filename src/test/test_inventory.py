@@ -0,0 +1,33 @@
+import os
+
+from pirg.inventory import Inventory
+from pirg.models import Package
+
+
+def test_inventory(tmpdir, site_packages):
+    dist = site_packages.add
+    paths = [site_packages.path.strpath]
+    dist("App", "1.0", ["lib-a", "Lib_B[fast]", 'lib-c; extra == "cli"'], extras=["cli"])
+    dist("lib-a", "2.0")
+    dist("lib_b", "1.0", ['lib-d; extra == "fast"'], extras=["fast"])
+    dist("lib-c", "1.0")
+    dist("lib-d", "1.0")
+    dist("other", "1.0", ["lib-a"])
+
+    cache_file = os.path.join(tmpdir, "inventory.json")
+    inventory = Inventory.load(cache_file, paths=paths)
+    assert inventory.version("LIB.B") == "1.0"
+    assert Inventory.load(cache_file, paths=paths).to_dict() == inventory.to_dict()
+
+    # lib-a is still needed by `other`
+    assert inventory.orphans([("app", "cli")], kept=[]) == {"lib-b", "lib-c", "lib-d"}
+    assert inventory.orphans([("app", None)], kept=[("lib-c", None)]) == {"lib-b", "lib-d"}
+    assert inventory.unneeded([("app", None)]) == {"lib-c", "other"}
+
+    assert inventory.satisfies(Package("app", specifier_set=">=1.0"))
+    assert not inventory.satisfies(Package("app", suffix="extra", specifier_set="==2.0"))
+    assert not inventory.satisfies(Package("missing"))
+
+    # new distribution changes the directory and invalidates the cache
+    dist("new", "1.0")
+    assert "new" in Inventory.load(cache_file, paths=paths)
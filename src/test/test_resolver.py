@@ -0,0 +1,92 @@
+import asyncio
+import os
+
+import pytest
+import responses
+from packaging.specifiers import Version
+from pirg.database import create_db
+from pirg.exceptions import UnknownPackage
+from pirg.indexes import IndexStats, json_url
+from pirg.models import Package
+from pirg.resolver import Resolver
+from pirg.utils import PYPI_URL, load_requirements_file
+
+
+def test_resolver(tmpdir, monkeypatch):
+    releases = {
+        "releases": {
+            "1.0.0": [{"requires_python": ">=3.8"}],
+            "1.2.0": [{"requires_python": ">=3.8"}],
+        }
+    }
+    package1, package2 = Package("package1", None, "==1.0.0"), Package("package2", None, "==1.0.0")
+    create_db(os.path.join(tmpdir, "db"), "<a>package1</a><a>package2</a><a>package3</a>")
+
+    with Resolver(cache_dir=tmpdir.strpath) as resolver:
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, PYPI_URL("package1"), json=releases)
+            rsps.add(responses.GET, PYPI_URL("package2"), json=releases)
+
+            plan = resolver.plan_install(["package1"], requirements={package1, package2})
+            assert [str(pkg) for pkg in plan.install] == ["package1==1.2.0"]
+            assert {str(pkg) for pkg in plan.requirements} == {"package1==1.2.0", "package2==1.0.0"}
+
+            report = resolver.outdated([package1, package2])
+            assert [row["latest"] for row in report] == ["1.2.0", "1.2.0"]
+
+        # statistics are saved after the fetch, not only on close
+        stats = IndexStats(os.path.join(tmpdir, "index_stats.json")).load()
+        assert stats["https://pypi.org/simple/"]["requests"] == 2
+
+        # metadata is reused, no request is made
+        with responses.RequestsMock():
+            coro = resolver.aresolve(["package1"], python_versions=[Version("3.9")])
+            matrix = asyncio.run(coro)
+        assert matrix == [{"name": "package1", "pins": {"3.9": "1.2.0"}, "all": "1.2.0"}]
+
+        # errors are raised, not turned into exit codes
+        with pytest.raises(UnknownPackage):
+            resolver.plan_install(["pakcage1"])
+
+        assert resolver.search("package3", limit=1) == ["package3"]
+
+        async def search_all():
+            return await asyncio.gather(*[resolver.asearch(f"package{i}") for i in range(3)])
+
+        assert len(asyncio.run(search_all())) == 3
+
+        # name filter and search index are kept per snapshot, not read again
+        def fail(*args, **kwargs):
+            raise AssertionError("database loaded again")
+
+        monkeypatch.setattr("pirg.resolver.load_name_filter", fail)
+        monkeypatch.setattr("pirg.resolver.load_search_index", fail)
+        with pytest.raises(UnknownPackage):
+            resolver.plan_install(["pakcage1"])
+        monkeypatch.undo()
+
+        requirements_path = os.path.join(tmpdir, "requirements.txt")
+        resolver.write_requirements(plan.requirements, requirements_path)
+        assert load_requirements_file(requirements_path) == plan.requirements
+
+    # a database built from PyPI doesn't reject packages private to a mirror
+    mirror = "https://mirror.example/simple/"
+    with Resolver(cache_dir=tmpdir.strpath, index_urls=[mirror]) as resolver:
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, json_url(mirror, "corp-lib"), json=releases)
+            plan = resolver.plan_install(["corp-lib"])
+        assert [str(pkg) for pkg in plan.install] == ["corp-lib==1.2.0"]
+
+    # least recently used metadata is dropped
+    with Resolver(cache_dir=tmpdir.strpath, metadata_max_entries=1) as resolver:
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, PYPI_URL("package1"), json=releases)
+            rsps.add(responses.GET, PYPI_URL("package2"), json=releases)
+            resolver.fetch(["package1"])
+            resolver.fetch(["package2"])
+
+        with responses.RequestsMock():
+            assert resolver.fetch(["package2"]) == {"package2": releases}
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, PYPI_URL("package1"), json=releases)
+            assert resolver.fetch(["package1"]) == {"package1": releases}
@@ -0,0 +1,35 @@
+import os
+
+from pirg.database import create_db, load_name_filter, load_search_index
+from pirg.search_index import SearchIndex
+
+
+def test_search_index(tmpdir):
+    db_dir = os.path.join(tmpdir, "db")
+    search_index = SearchIndex(os.path.join(tmpdir, "index"), max_segments=2)
+
+    def data(package_names):
+        return "".join(f"<a>{name}</a>" for name in package_names)
+
+    # first database is a full build
+    snapshot = create_db(db_dir, data(["numpy", "Flask"]), search_index=search_index)
+    assert load_search_index(snapshot, search_index) == {"numpy": "numpy", "flask": "Flask"}
+
+    # updates are appended as segments, tombstones remove names
+    snapshot = create_db(db_dir, data(["numpy", "flask", "pandas"]), search_index=search_index)
+    assert len(search_index._read_manifest()["segments"]) == 2
+    assert load_search_index(snapshot, search_index) == {
+        "numpy": "numpy",
+        "flask": "flask",
+        "pandas": "pandas",
+    }
+    assert "pandas" in load_name_filter(snapshot)
+
+    # past `max_segments` everything is compacted into one segment
+    snapshot = create_db(db_dir, data(["flask", "pandas"]), search_index=search_index)
+    assert len(search_index._read_manifest()["segments"]) == 1
+    assert load_search_index(snapshot, search_index) == {"flask": "flask", "pandas": "pandas"}
+
+    # index of another database version is not used
+    search_index.rebuild(["other"], "old-version")
+    assert load_search_index(snapshot, search_index) == {"flask": "flask", "pandas": "pandas"}
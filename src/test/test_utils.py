@@ -1,17 +1,35 @@
+import gzip
 import os
 import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
 import responses
 import pytest
 from packaging.specifiers import Version
-from pirg.exceptions import DisabledPipFlag, EmptyDatabase, WrongSpecifierSet, WrongPkgName
+from pirg.exceptions import (
+    DisabledPipFlag,
+    EmptyDatabase,
+    NoCompatibleVersion,
+    WrongSpecifierSet,
+    WrongPkgName,
+)
+from pirg.models import Package
 from pirg.utils import (
     PYPI_URL,
     check_for_pip_args,
+    check_if_pypi_simple_is_modified,
+    check_outdated,
     fuzzy_search,
+    get_pypi_simple_data,
     load_requirements_file,
     get_package,
+    get_specifier_set,
     check_for_requirements_file,
+    make_package,
     parse_package_name,
+    resolve_matrix,
 )
 
 
@@ -181,6 +199,25 @@ def test_parse_package_name():
     assert not pkg_specifier_set
 
 
+def test_make_package(tmpdir):
+    pkg = make_package("SomePackage[suffix]>=2.0.0")
+    assert pkg == Package(name="SomePackage", suffix="suffix", specifier_set=">=2.0.0")
+    # same string, same object
+    assert make_package("SomePackage[suffix]>=2.0.0") is pkg
+    assert get_specifier_set(">=2.0.0") is get_specifier_set(">=2.0.0")
+
+    with pytest.raises(AttributeError):
+        pkg.name = "other"
+
+    requirements_path = os.path.join(tmpdir, "requirements.txt")
+    with open(requirements_path, "w") as req_file:
+        req_file.write("SomePackage[suffix]>=2.0.0\nSomePackage[suffix]>=2.0.0\r\n")
+    assert load_requirements_file(requirements_path) == {pkg}
+
+    with pytest.raises(WrongPkgName):
+        make_package("[suffix]>=2.0.0")
+
+
 def test_fuzzy_search():
     test_db = {
         "package1": "Package1",
@@ -203,3 +240,229 @@ def test_fuzzy_search():
 
     with pytest.raises(EmptyDatabase):
         _ = fuzzy_search(search_term, {})
+
+    # more results than the fuzzywuzzy default of 5
+    test_db = {f"package{i}": f"package{i}" for i in range(10)}
+    assert len(fuzzy_search("package1", test_db, limit=10, cutoff=0.5)) == 10
+    assert len(fuzzy_search("package1", test_db, limit=3, cutoff=0.5)) == 3
+
+
+def test_check_outdated(tmpdir):
+    releases = {
+        "1.0.0": [{"requires_python": ">=3.8", "filename": "package1-1.0.0.tar.gz"}],
+        "1.2.0": [{"requires_python": ">=3.8", "filename": "package1-1.2.0.tar.gz"}],
+        "2.0.0rc1": [{"requires_python": ">=3.8", "filename": "package1-2.0.0rc1.tar.gz"}],
+    }
+    packages = [
+        Package("package1", specifier_set="==1.0.0"),
+        Package("package2", specifier_set="==1.2.0"),
+        Package("package3", specifier_set=">=1.0"),
+    ]
+    cache_dir = os.path.join(tmpdir, "json")
+
+    with responses.RequestsMock() as rsps:
+        rsps.add(
+            responses.GET,
+            PYPI_URL("package1"),
+            json={"releases": releases},
+            headers={"ETag": '"a"'},
+        )
+        rsps.add(responses.GET, PYPI_URL("package2"), json={"releases": releases})
+        report = check_outdated(packages, cache_dir=cache_dir)
+
+    assert report == [
+        {
+            "name": "package1",
+            "current": "1.0.0",
+            "latest": "1.2.0",
+            "outdated": True,
+            "error": None,
+        },
+        {
+            "name": "package2",
+            "current": "1.2.0",
+            "latest": "1.2.0",
+            "outdated": False,
+            "error": None,
+        },
+    ]
+
+    # unchanged project is revalidated, not downloaded again
+    with responses.RequestsMock() as rsps:
+        rsps.add(
+            responses.GET,
+            PYPI_URL("package1"),
+            status=304,
+            match=[responses.matchers.header_matcher({"If-None-Match": '"a"'})],
+        )
+        rsps.add(responses.GET, PYPI_URL("package2"), status=404)
+        report = check_outdated(packages[:2], cache_dir=cache_dir)
+
+    assert report[0]["latest"] == "1.2.0"
+    assert report[1]["latest"] is None
+    assert "404" in report[1]["error"]
+
+
+def test_resolve_matrix():
+    python_versions = [Version("3.8"), Version("3.12")]
+    releases = {
+        "1.0.0": [{"requires_python": ">=3.8"}],
+        "1.1.0": [{"requires_python": ">=3.8"}, {"requires_python": None}],
+        "2.0.0": [{"requires_python": ">=3.9"}],
+        "2.1.0rc1": [{"requires_python": ">=3.9"}],
+    }
+
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, PYPI_URL("package1"), json={"releases": releases})
+        matrix = resolve_matrix(["package1[extra]", "package1<2"], python_versions)
+
+    assert matrix == [
+        {"name": "package1[extra]", "pins": {"3.8": "1.1.0", "3.12": "2.0.0"}, "all": "1.1.0"},
+        {"name": "package1", "pins": {"3.8": "1.1.0", "3.12": "1.1.0"}, "all": "1.1.0"},
+    ]
+
+    # newest release compatible with every target
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, PYPI_URL("package1"), json={"releases": releases})
+        result = get_package("package1", python_versions=python_versions)
+    assert str(result.specifier_set) == "==1.1.0"
+
+    releases = {"1.0.0": [{"requires_python": "<3.9"}], "2.0.0": [{"requires_python": ">=3.9"}]}
+    with pytest.raises(NoCompatibleVersion):
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, PYPI_URL("package1"), json={"releases": releases})
+            _ = get_package("package1", python_versions=python_versions)
+
+    # releases that declare requires_python are not a fallback for unsupported targets
+    releases = {"1.0": [{"requires_python": ">=3.10"}], "1.1": [{"requires_python": ">=3.10"}]}
+    python_versions = [Version("3.9"), Version("3.12")]
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, PYPI_URL("package1"), json={"releases": releases})
+        matrix = resolve_matrix(["package1"], python_versions)
+    assert matrix == [{"name": "package1", "pins": {"3.9": None, "3.12": "1.1"}, "all": None}]
+
+    with pytest.raises(NoCompatibleVersion):
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, PYPI_URL("package1"), json={"releases": releases})
+            _ = get_package("package1", python_versions=python_versions)
+
+    # nothing declares requires_python, every release is a candidate
+    releases = {"1.0": [{"requires_python": None}], "1.1": [{"requires_python": None}]}
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, PYPI_URL("package1"), json={"releases": releases})
+        matrix = resolve_matrix(["package1"], python_versions)
+    assert matrix[0]["all"] == "1.1"
+
+
+class SimpleIndexHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for PyPI simple index: gzip, ETag, Range/If-Range, a connection
+    that can be dropped after `cut_after` bytes and a `Content-Range` off by `range_skew`.
+    """
+
+    body = gzip.compress(b"".join(b"<a>package%d</a>\n" % i for i in range(20000)))
+    etag = '"v1"'
+    cut_after = None
+    range_skew = 0
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).requests.append(dict(self.headers))
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == self.etag:
+            start = int(range_header.split("=")[1].rstrip("-"))
+
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body) - start))
+        if start:
+            self.send_header(
+                "Content-Range",
+                f"bytes {start + self.range_skew}-{len(self.body) - 1}/{len(self.body)}",
+            )
+        self.end_headers()
+
+        cut_after = type(self).cut_after
+        if cut_after:
+            type(self).cut_after = None
+            self.wfile.write(self.body[start:cut_after])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(self.body[start:])
+
+
+def test_get_pypi_simple_data(tmpdir, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SimpleIndexHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/simple/"
+    partial_file = os.path.join(tmpdir, "download", "simple.partial")
+    expected = gzip.decompress(SimpleIndexHandler.body).decode()
+
+    try:
+        # connection drops, process "dies" with the partial file left behind
+        SimpleIndexHandler.cut_after = 1000
+        with pytest.raises(requests.ConnectionError):
+            get_pypi_simple_data(url, partial_file=partial_file, retries=0)
+        assert os.path.getsize(partial_file) == 1000
+        assert SimpleIndexHandler.requests[-1]["Accept-Encoding"] == "gzip, deflate"
+
+        # next run continues from the partial file
+        data, etag = get_pypi_simple_data(url, partial_file=partial_file)
+        assert data == expected
+        assert etag == '"v1"'
+        assert SimpleIndexHandler.requests[-1]["Range"] == "bytes=1000-"
+        assert not os.path.exists(partial_file)
+
+        # retried within the same run
+        SimpleIndexHandler.cut_after = 2000
+        data, _ = get_pypi_simple_data(url, partial_file=partial_file)
+        assert data == expected
+        assert SimpleIndexHandler.requests[-1]["Range"] == "bytes=2000-"
+
+        # index changed in between, If-Range fails and download starts over
+        SimpleIndexHandler.cut_after = 3000
+        with pytest.raises(requests.ConnectionError):
+            get_pypi_simple_data(url, partial_file=partial_file, retries=0)
+        SimpleIndexHandler.etag = '"v2"'
+        data, etag = get_pypi_simple_data(url, partial_file=partial_file)
+        assert data == expected
+        assert etag == '"v2"'
+
+        # partial answer for another offset is dropped and the download starts over
+        SimpleIndexHandler.cut_after = 1000
+        with pytest.raises(requests.ConnectionError):
+            get_pypi_simple_data(url, partial_file=partial_file, retries=0)
+        monkeypatch.setattr(SimpleIndexHandler, "range_skew", 1)
+        data, _ = get_pypi_simple_data(url, partial_file=partial_file)
+        assert data == expected
+        assert "Range" not in SimpleIndexHandler.requests[-1]
+
+        # corrupt body is an error and leaves nothing to resume from
+        monkeypatch.setattr(SimpleIndexHandler, "body", b"not gzip")
+        with pytest.raises(requests.exceptions.ContentDecodingError):
+            get_pypi_simple_data(url, partial_file=partial_file)
+        assert not os.path.exists(partial_file)
+        assert not os.path.exists(partial_file + ".json")
+    finally:
+        server.shutdown()
+
+
+def test_check_if_pypi_simple_is_modified():
+    url = "https://pypi.org/simple/"
+
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.HEAD, url, status=304)
+        assert not check_if_pypi_simple_is_modified(url=url, etag='"v1"')
+        assert rsps.calls[0].request.headers["If-None-Match"] == '"v1"'
+        assert rsps.calls[0].request.req_kwargs["timeout"] == 10
+
+        # a stalled index times out instead of hanging initdb
+        rsps.replace(responses.HEAD, url, body=requests.Timeout("stalled"))
+        with pytest.raises(requests.Timeout):
+            check_if_pypi_simple_is_modified(url=url)